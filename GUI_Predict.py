@@ -2,10 +2,11 @@ import tkinter as tk
 from tkinter import messagebox
 import joblib
 import pandas as pd
+from scoring_server import score_rows
 
-# --- Load the trained model ---
+# --- Trained model, only loaded if the scoring server is not running ---
 model_path = r"D:\NASA_hackathon_2025\shark_rf_model.joblib"
-model = joblib.load(model_path)
+model = None
 
 # --- GUI Setup ---
 root = tk.Tk()
@@ -21,6 +22,17 @@ for i, feature in enumerate(features):
     entry.grid(row=i, column=1, padx=10, pady=5)
     entries[feature] = entry
 
+# Score on the scoring server (scoring_server.py), falling back to a local model
+def score(df):
+    global model
+    try:
+        probs, presence = score_rows(df)
+        return probs[0], presence[0]
+    except OSError:
+        if model is None:
+            model = joblib.load(model_path)
+        return model.predict_proba(df)[:, 1][0], model.predict(df)[0]
+
 # Function to predict
 def predict():
     try:
@@ -29,8 +41,7 @@ def predict():
         df = pd.DataFrame(input_data)
         
         # Get prediction probability
-        prob = model.predict_proba(df)[:, 1][0]
-        pred = model.predict(df)[0]
+        prob, pred = score(df)
         
         messagebox.showinfo("Prediction Result",
                             f"Predicted Presence: {pred}\nProbability of Presence: {prob:.3f}")
@@ -0,0 +1,239 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from swot_cache import file_fingerprint, write_npz_cache
+from swot_regrid import MAX_DISTANCE_KM, lookup_grid_values
+
+# --- CONFIGURATION ---
+# 'uniform'      - every valid ocean cell of every covered day equally likely
+# 'stratified'   - the same number of points in every (day, spatial block) stratum
+#                  that has valid cells, so sparse days and regions are not swamped
+# 'target_group' - days and spatial blocks weighted by their number of presence
+#                  points, so the background shares the tags' sampling bias
+SAMPLING_MODES = ['uniform', 'stratified', 'target_group']
+
+# Spatial blocks (rows, columns) over the sampling box for stratified and target-group sampling
+STRATA_SHAPE = (4, 4)
+
+MASK_VERSION = 2
+
+
+# --- SCRIPT ---
+
+def _axis_slice(coords, low, high):
+    inside = np.flatnonzero((coords >= low) & (coords <= high))
+    if len(inside) == 0:
+        return slice(0, 0)
+    return slice(inside[0], inside[-1] + 1)
+
+
+def daily_validity_mask(day_files, variables, bounds, cache_dir=None, ssha_grid=None):
+    """
+    Returns (lat, lon, mask) for the part of the MODIS grid inside bounds
+    (min_lat, max_lat, min_lon, max_lon), where mask is True for cells that
+    have a finite value in every one of variables on that day (i.e. ocean
+    cells with coverage). Returns None if a variable has no file.
+
+    'ssha_karin' in variables needs the day's SWOT files (day_files['ssh']).
+    ssha_grid, if given, is a function returning the day's SWOT data
+    regridded onto the MODIS grid as (cells, values), like
+    swot_regrid.regrid_swot_day; only the cells that get a value are then
+    valid. Without it any cell is (nearest swath point matching).
+
+    With cache_dir, masks are stored as packed bits and keyed by the
+    fingerprints of the source files and the bounds.
+    """
+    modis_vars = [var for var in variables if var != 'ssha_karin']
+    swot_files = sorted(day_files.get('ssh') or []) if 'ssha_karin' in variables else []
+    if any(var not in day_files for var in modis_vars) or ('ssha_karin' in variables and not swot_files):
+        return None
+    paths = [day_files[var] for var in modis_vars]
+    key = hashlib.sha1(json.dumps([MASK_VERSION, list(map(float, bounds)), MAX_DISTANCE_KM if ssha_grid else None] +
+                                  [file_fingerprint(p) for p in paths + swot_files]).encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, f'{key}.npz') if cache_dir else None
+
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as cached:
+                lat, lon = cached['lat'], cached['lon']
+                mask = np.unpackbits(cached['mask'], count=len(lat) * len(lon)).astype(bool)
+                return lat, lon, mask.reshape(len(lat), len(lon))
+        except Exception as e:
+            print(f"Warning: rebuilding unreadable validity mask {cache_file}: {e}")
+
+    min_lat, max_lat, min_lon, max_lon = bounds
+    mask = None
+    for var, path in zip(modis_vars, paths):
+        with xr.open_dataset(path) as ds:
+            rows = _axis_slice(ds['lat'].values, min_lat, max_lat)
+            cols = _axis_slice(ds['lon'].values, min_lon, max_lon)
+            window = ds[var].isel(lat=rows, lon=cols)
+            finite = np.isfinite(window.values)
+            if mask is None:
+                lat, lon, mask = window['lat'].values, window['lon'].values, finite
+            else:
+                mask &= finite
+
+    if swot_files and ssha_grid is not None:
+        cells, values = ssha_grid()
+        rows, cols = np.nonzero(mask)
+        mask[rows, cols] = np.isfinite(lookup_grid_values(cells, values, lat[rows], lon[cols]))
+
+    if cache_file:
+        write_npz_cache(cache_file, lat=lat, lon=lon, mask=np.packbits(mask.ravel()))
+    return lat, lon, mask
+
+
+def _grid_position(coords, values):
+    """
+    Index of the nearest node of a regular 1-D grid (ascending or descending) for each value.
+    """
+    if len(coords) < 2:
+        return np.zeros(len(values), dtype=np.int64)
+    step = (coords[-1] - coords[0]) / (len(coords) - 1)
+    return np.clip(np.round((values - coords[0]) / step), 0, len(coords) - 1).astype(np.int64)
+
+
+def _block_ids(mask, strata_shape):
+    """
+    Flat indices of the valid cells of mask and the spatial block of each.
+    """
+    cells = np.flatnonzero(mask)
+    rows, cols = np.divmod(cells, mask.shape[1])
+    block_rows = rows * strata_shape[0] // mask.shape[0]
+    block_cols = cols * strata_shape[1] // mask.shape[1]
+    return cells, block_rows * strata_shape[1] + block_cols
+
+
+def _draw(rng, weights, n):
+    """
+    Splits n draws over categories with the given weights (multinomial);
+    all-zero weights give no draws.
+    """
+    total = weights.sum()
+    if n <= 0 or total <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    return rng.multinomial(n, weights / total)
+
+
+def _even_split(rng, n, n_strata):
+    """
+    n draws over n_strata strata: n // n_strata each, with the remainder
+    assigned to randomly chosen strata.
+    """
+    counts = np.full(n_strata, n // n_strata, dtype=np.int64)
+    counts[rng.choice(n_strata, n % n_strata, replace=False)] += 1
+    return counts
+
+
+def sample_day(rng, lat, lon, mask, block_counts, strata_shape, date):
+    """
+    Draws block_counts[b] cells uniformly among the valid cells of each
+    spatial block b, jitters them within their grid cell and gives them
+    uniform times within date. Blocks without valid cells yield no points.
+    """
+    cells, blocks = _block_ids(mask, strata_shape)
+    n_blocks = strata_shape[0] * strata_shape[1]
+    cells_per_block = np.bincount(blocks, minlength=n_blocks)
+    block_counts = np.where(cells_per_block > 0, block_counts, 0)
+    if block_counts.sum() == 0:
+        return None
+
+    # Cells grouped by block, so block b owns cells[starts[b]:starts[b] + cells_per_block[b]]
+    cells = cells[np.argsort(blocks, kind='stable')]
+    starts = np.concatenate([[0], np.cumsum(cells_per_block)[:-1]])
+    draw_blocks = np.repeat(np.arange(n_blocks), block_counts)
+    picks = cells[starts[draw_blocks] + (rng.random(len(draw_blocks)) * cells_per_block[draw_blocks]).astype(np.int64)]
+    rows, cols = np.divmod(picks, mask.shape[1])
+
+    dlat = abs(lat[1] - lat[0]) if len(lat) > 1 else 0.0
+    dlon = abs(lon[1] - lon[0]) if len(lon) > 1 else 0.0
+    day_start = pd.Timestamp(date).value
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(day_start + rng.integers(0, 86_400 * 10**9, len(picks), dtype=np.int64)),
+        'latitude': lat[rows] + (rng.random(len(picks)) - 0.5) * dlat,
+        'longitude': lon[cols] + (rng.random(len(picks)) - 0.5) * dlon,
+        'presence': 0,
+    })
+
+
+def _empty_background():
+    return pd.DataFrame({'timestamp': pd.to_datetime([]), 'latitude': [], 'longitude': [], 'presence': []})
+
+
+def sample_background(presence_points, n_points, day_files_by_date, variables, mode='stratified',
+                      seed=None, strata_shape=STRATA_SHAPE, cache_dir=None, ssha_grid=None):
+    """
+    Draws n_points pseudo-absence points inside the bounding box and date
+    range of presence_points, only from ocean cells that have every one of
+    variables on that day (see daily_validity_mask). day_files_by_date maps
+    each date to its files, as find_day_files() returns them. ssha_grid, a
+    function of ('YYYYMMDD', swot_files) returning the day's regridded
+    (cells, values), restricts 'ssha_karin' to the cells near a swath. See
+    SAMPLING_MODES for mode; seed makes the draw reproducible.
+
+    Returns a DataFrame with timestamp, latitude, longitude and presence = 0.
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown background sampling mode '{mode}', expected one of {SAMPLING_MODES}")
+    rng = np.random.default_rng(seed)
+    bounds = (presence_points['latitude'].min(), presence_points['latitude'].max(),
+              presence_points['longitude'].min(), presence_points['longitude'].max())
+
+    masks = {}
+    for date in sorted(day_files_by_date):
+        day_files = day_files_by_date[date]
+        day_grid = None
+        if ssha_grid is not None:
+            day_grid = lambda date=date, files=day_files.get('ssh'): ssha_grid(date.strftime('%Y%m%d'), files)
+        try:
+            day_mask = daily_validity_mask(day_files, variables, bounds, cache_dir, day_grid)
+        except Exception as e:
+            # An unreadable file only removes its day from the sampling frame
+            print(f"Warning: no background points for {date}: {e}")
+            continue
+        if day_mask is not None and day_mask[2].any():
+            masks[date] = day_mask
+    if not masks:
+        print("Warning: no day has valid environmental coverage; no background points drawn.")
+        return _empty_background()
+
+    dates = list(masks)
+    if mode == 'uniform':
+        # One block per day; days weighted by their number of valid cells
+        strata_shape = (1, 1)
+        day_weights = np.array([masks[d][2].sum() for d in dates], dtype=np.float64)
+        counts = _draw(rng, day_weights, n_points)[:, None]
+    else:
+        n_blocks = strata_shape[0] * strata_shape[1]
+        occupied = np.array([np.bincount(_block_ids(masks[d][2], strata_shape)[1], minlength=n_blocks) > 0
+                             for d in dates])
+        if mode == 'stratified':
+            counts = np.zeros(occupied.shape, dtype=np.int64)
+            counts[occupied] = _even_split(rng, n_points, int(occupied.sum()))
+        else:
+            # Sampling effort of the tags: presence points per day and per spatial block
+            per_day = presence_points['timestamp'].dt.date.value_counts()
+            lat, lon, mask = masks[dates[0]]
+            rows = _grid_position(lat, presence_points['latitude'].values)
+            cols = _grid_position(lon, presence_points['longitude'].values)
+            presence_blocks = (rows * strata_shape[0] // mask.shape[0]) * strata_shape[1] + cols * strata_shape[1] // mask.shape[1]
+            block_weights = occupied * np.bincount(presence_blocks, minlength=n_blocks)
+
+            day_weights = np.array([per_day.get(d, 0) for d in dates]) * (block_weights.sum(axis=1) > 0)
+            day_counts = _draw(rng, day_weights.astype(np.float64), n_points)
+            counts = np.array([_draw(rng, w.astype(np.float64), k) for w, k in zip(block_weights, day_counts)])
+
+    samples = [sample_day(rng, *masks[d], counts[i], strata_shape, d) for i, d in enumerate(dates) if counts[i].sum()]
+    samples = [s for s in samples if s is not None]
+    if not samples:
+        # e.g. n_points == 0, or no covered day has presence points in 'target_group' mode
+        print(f"Warning: no '{mode}' background points drawn.")
+        return _empty_background()
+    background = pd.concat(samples, ignore_index=True)
+    print(f"Sampled {len(background)} '{mode}' background points over {len(dates)} day(s) with coverage.")
+    return background
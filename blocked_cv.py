@@ -0,0 +1,126 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+# 'tag'  - all points of one tag in the same fold (background points, which
+#          have no tag, are blocked by space-time tile)
+# 'tile' - space-time tiles of TILE_DEGREES x TILE_DEGREES x TILE_DAYS
+# 'date' - consecutive blocks of DATE_BLOCK_DAYS days
+BLOCK_MODES = ['tag', 'tile', 'date']
+
+TILE_DEGREES = 2.0
+TILE_DAYS = 7
+DATE_BLOCK_DAYS = 14
+
+# Columns each mode needs besides the features and target
+BLOCK_COLUMNS = {
+    'tag': ['id', 'timestamp', 'latitude', 'longitude'],
+    'tile': ['timestamp', 'latitude', 'longitude'],
+    'date': ['timestamp'],
+}
+
+
+# --- SCRIPT ---
+
+def _days(timestamps):
+    return pd.to_datetime(timestamps).values.astype('datetime64[D]').astype(np.int64)
+
+
+def tile_blocks(df, degrees=TILE_DEGREES, days=TILE_DAYS):
+    """
+    Integer block of each row's space-time tile.
+    """
+    key = np.zeros(len(df), dtype=np.int64)
+    for code in (np.floor(df['latitude'].to_numpy() / degrees).astype(np.int64),
+                 np.floor(df['longitude'].to_numpy() / degrees).astype(np.int64),
+                 _days(df['timestamp']) // days):
+        # Mixed-radix packing of the three tile indices into one integer
+        code = code - code.min()
+        key = key * (code.max() + 1) + code
+    return np.unique(key, return_inverse=True)[1].ravel()
+
+
+def date_blocks(df, days=DATE_BLOCK_DAYS):
+    return np.unique(_days(df['timestamp']) // days, return_inverse=True)[1].ravel()
+
+
+def tag_blocks(df):
+    """
+    One block per tag id; rows without an id are blocked by space-time tile,
+    numbered after the tags.
+    """
+    tags, _ = pd.factorize(df['id'])  # missing ids become -1
+    untagged = tags < 0
+    blocks = tags.astype(np.int64)
+    if untagged.any():
+        blocks[untagged] = tags.max() + 1 + tile_blocks(df[untagged])
+    return blocks
+
+
+def block_ids(df, mode):
+    if mode == 'tag':
+        return tag_blocks(df)
+    if mode == 'tile':
+        return tile_blocks(df)
+    if mode == 'date':
+        return date_blocks(df)
+    raise ValueError(f"Unknown CV block mode '{mode}', expected one of {BLOCK_MODES}")
+
+
+def assign_folds(blocks, y, n_folds, seed=42):
+    """
+    Assigns whole blocks to folds, separately for mostly-presence and
+    mostly-background blocks: largest block first, each goes to the fold
+    with the fewest rows of its group so far (ties broken at random). The
+    first n_folds blocks of a group land in different folds, so every fold
+    keeps both classes. Raises ValueError if a group has fewer blocks than
+    folds. Returns the fold of every row.
+    """
+    y = np.asarray(y)
+    n_blocks = blocks.max() + 1
+    sizes = np.bincount(blocks, minlength=n_blocks)
+    positive = np.bincount(blocks, weights=y, minlength=n_blocks)
+
+    block_fold = np.zeros(n_blocks, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    mostly_presence = positive * 2 >= sizes
+    for group, name in ((mostly_presence, 'presence'), (~mostly_presence, 'background')):
+        members = np.flatnonzero(group & (sizes > 0))
+        if len(members) < n_folds:
+            raise ValueError(f"Only {len(members)} mostly-{name} block(s) for {n_folds} folds; "
+                             f"use fewer folds or smaller blocks")
+        # Shuffled first, so the stable sort breaks size ties at random
+        members = rng.permutation(members)
+        members = members[np.argsort(-sizes[members], kind='stable')]
+        # Heap of (rows so far, fold): the emptiest fold is always on top
+        heap = [(0, fold) for fold in range(n_folds)]
+        folds = np.empty(len(members), dtype=np.int64)
+        for k, size in enumerate(sizes[members].tolist()):
+            rows, fold = heap[0]
+            folds[k] = fold
+            heapq.heapreplace(heap, (rows + size, fold))
+        block_fold[members] = folds
+    return block_fold[blocks]
+
+
+def blocked_splits(df, y, mode, n_folds, seed=42):
+    """
+    (train_idx, test_idx) pairs of a blocked K-fold split of df by mode
+    (see BLOCK_MODES); folds are whole blocks, so no block is in both the
+    training and the test rows of a fold.
+    """
+    blocks = block_ids(df, mode)
+    if blocks.max() + 1 < n_folds:
+        raise ValueError(f"Only {blocks.max() + 1} '{mode}' block(s) for {n_folds} folds; "
+                         f"use fewer folds or smaller blocks")
+    folds = assign_folds(blocks, y, n_folds, seed)
+    y = np.asarray(y)
+    print(f"Blocked CV by {mode}: {blocks.max() + 1} blocks in {n_folds} folds")
+    splits = []
+    for fold in range(n_folds):
+        test = folds == fold
+        if len(np.unique(y[test])) < 2:
+            print(f"Warning: fold {fold + 1} has a single class; its AUC is undefined.")
+        splits.append((np.flatnonzero(~test), np.flatnonzero(test)))
+    return splits
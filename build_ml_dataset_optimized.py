@@ -1,11 +1,25 @@
 import pandas as pd
 import xarray as xr
 import numpy as np
-import glob
 import os
+import json
+import hashlib
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
-from scipy.spatial import cKDTree  # Efficient library for nearest-neighbor lookups
+from swot_cache import load_swot_day, file_fingerprint
+from swot_regrid import regrid_swot_day, lookup_grid_values
+from swot_store import day_granules
+from catalog import load_catalog, modis_fields
+from dataset_io import write_training_dataset, read_training_dataset
+from shark_tracks import load_shark_tracks
+from background_sampler import sample_background
+
+try:
+    import dask  # enables chunked lazy reads in xarray
+    _HAS_DASK = True
+except ImportError:
+    _HAS_DASK = False
 
 # --- 1. CONFIGURATION: UPDATE THESE PATHS ---
 BASE_DIR = r"D:\NASA_hackathon_2025"
@@ -17,35 +31,282 @@ CARBON_DIR = os.path.join(BASE_DIR, 'pythoplankton')
 SST_DIR = os.path.join(BASE_DIR, 'SST')
 SSH_DIR = os.path.join(BASE_DIR, 'SSH')  # Path to the folder with raw SWOT.nc files
 
+# File catalog index shared with the other scripts (see catalog.py)
+CATALOG_DIRS = {'chlor_a': CHLOR_DIR, 'carbon_phyto': CARBON_DIR, 'sst': SST_DIR, 'ssh': SSH_DIR}
+CATALOG_FILE = os.path.join(BASE_DIR, 'file_catalog.json')
+
+# Prepared SWOT point sets and KD-trees, reused across builds
+SWOT_CACHE_DIR = os.path.join(BASE_DIR, 'swot_cache')
+
+# Compact per-day SWOT store (see swot_store.py): only latitude, longitude,
+# time and ssha_karin as float32, so SWOT is read from megabytes instead of
+# full granules. None reads the raw granules instead.
+SWOT_STORE_DIR = os.path.join(BASE_DIR, 'swot_store')
+
+# How ssha_karin is matched to points: 'regrid' averages the SWOT swath onto
+# the MODIS 4km grid (cells farther than swot_regrid.MAX_DISTANCE_KM from the
+# swath stay NaN), 'nearest' takes the nearest swath point at any distance
+SSHA_METHOD = 'regrid'
+
+# Cached swath-to-grid mappings, one per SWOT pass, reused across cycles
+REGRID_CACHE_DIR = os.path.join(BASE_DIR, 'swot_regrid_cache')
+
+# Study period (inclusive)
+START_DATE = '2014-04-12'
+END_DATE = '2015-12-31'
+
+# Outputs of the build: a directory is written as a month-partitioned Parquet
+# dataset (read it with dataset_io.read_training_dataset), a .csv as CSV
+OUTPUT_FILES = ['training_dataset', 'training_dataset_one_month.csv']
+
+# MODIS grids are read lazily in chunks of this size (needs dask), and only
+# the window around each day's points, plus this margin in grid cells
+MODIS_CHUNKS = {'lat': 512, 'lon': 512}
+MODIS_WINDOW_MARGIN = 12  # ~0.5 degree at 4km
+
+# Incremental builds keep the rows of unchanged days from the first entry of
+# OUTPUT_FILES; the per-day fingerprints of the last build are stored here
+INCREMENTAL = True
+BUILD_MANIFEST = 'training_dataset_manifest.json'
+
+# Pseudo-absence sampling (Step B, see background_sampler.py): BACKGROUND_RATIO
+# background points per presence point, drawn only from ocean cells that have
+# every MODIS variable and ssha_karin on their day. BACKGROUND_MODE is 'uniform', 'stratified'
+# or 'target_group'; RANDOM_SEED = None draws a different sample every build
+BACKGROUND_MODE = 'stratified'
+BACKGROUND_RATIO = 2
+RANDOM_SEED = 42
+VALIDITY_MASK_DIR = os.path.join(BASE_DIR, 'validity_masks')
+
+# Number of worker processes for Step C (one task per day); 1 runs serially
+N_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
 
 # --- 2. SCRIPT ---
 
-def build_training_dataset_optimized():
+MODIS_VARS = ['chlor_a', 'carbon_phyto', 'sst']
+
+
+def nearest_grid_index(coords, values):
+    """
+    Returns the index of the nearest grid node for each value on a regularly
+    spaced 1-D coordinate axis (ascending or descending), clipped to the grid.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    step = (coords[-1] - coords[0]) / (len(coords) - 1)
+    idx = np.rint((np.asarray(values, dtype=np.float64) - coords[0]) / step)
+    return np.clip(np.nan_to_num(idx), 0, len(coords) - 1).astype(np.int64)
+
+
+def open_modis_dataset(file_path):
+    """
+    Opens a MODIS grid lazily; with dask installed the variables are chunked
+    so that a window read only touches the chunks it overlaps.
+    """
+    return xr.open_dataset(file_path, chunks=MODIS_CHUNKS if _HAS_DASK else None)
+
+
+def extract_modis_values(daily_modis_data, group):
+    """
+    Batched nearest-neighbour extraction of the MODIS variables for all points
+    of one day. The 4km L3m grids are regular, so the nearest cell of every
+    point is an index calculation. Only the lat/lon window covering the day's
+    points (plus MODIS_WINDOW_MARGIN cells) is read from each variable, and
+    the values are gathered from it by fancy indexing.
+    Returns a DataFrame aligned to group.index.
+    """
+    lats = group['latitude'].to_numpy(dtype=np.float64)
+    lons = group['longitude'].to_numpy(dtype=np.float64)
+    valid = np.isfinite(lats) & np.isfinite(lons)
+
+    features = {}
+    for var in MODIS_VARS:
+        values = np.full(len(group), np.nan)
+        ds = daily_modis_data.get(var)
+        if ds is not None and var in ds.variables and valid.any():
+            ilat = nearest_grid_index(ds['lat'].values, lats)
+            ilon = nearest_grid_index(ds['lon'].values, lons)
+            lat0 = max(ilat[valid].min() - MODIS_WINDOW_MARGIN, 0)
+            lat1 = min(ilat[valid].max() + MODIS_WINDOW_MARGIN, ds.sizes['lat'] - 1)
+            lon0 = max(ilon[valid].min() - MODIS_WINDOW_MARGIN, 0)
+            lon1 = min(ilon[valid].max() + MODIS_WINDOW_MARGIN, ds.sizes['lon'] - 1)
+            window = ds[var].isel(lat=slice(lat0, lat1 + 1), lon=slice(lon0, lon1 + 1)).values
+            data = window[np.clip(ilat - lat0, 0, lat1 - lat0), np.clip(ilon - lon0, 0, lon1 - lon0)]
+            values = np.where(valid, data, np.nan)
+        features[var] = values
+
+    return pd.DataFrame(features, index=group.index)
+
+
+def find_day_files(catalog, date):
+    """
+    Looks up the MODIS files (one per variable) and SWOT granules for one date.
+    """
+    day_files = {}
+    for var in MODIS_VARS:
+        paths = catalog.files_for(var, date, **modis_fields(var))
+        if paths:
+            day_files[var] = paths[0]
+    day_files['ssh'] = catalog.files_for('ssh', date)
+    return day_files
+
+
+def store_granules(date_str, swot_files):
+    """
+    The granules argument of regrid_swot_day/load_swot_day: reads the day
+    from SWOT_STORE_DIR, or None to read the raw granules.
+    """
+    if SWOT_STORE_DIR is None or not swot_files:
+        return None
+    return lambda: day_granules(date_str, swot_files, SWOT_STORE_DIR)
+
+
+def regrid_day(date_str, swot_files):
+    """
+    ssha_karin of one day regridded onto the MODIS grid, as the (cells,
+    values) of regrid_swot_day.
+    """
+    return regrid_swot_day(swot_files, REGRID_CACHE_DIR, store_granules(date_str, swot_files))
+
+
+def process_day(date, group, day_files):
+    """
+    Matches MODIS and SWOT data for all points of one day.
+    day_files is the find_day_files() result for that date.
+    Returns a DataFrame of environmental features aligned to group.index.
+    """
+    # --- Part 1: Match MODIS Data ---
+    daily_modis_data = {}
+
+    try:
+        for var in MODIS_VARS:
+            if var in day_files:
+                daily_modis_data[var] = open_modis_dataset(day_files[var])
+
+        day_results = extract_modis_values(daily_modis_data, group)
+    finally:
+        for ds in daily_modis_data.values():
+            ds.close()
+
+    # --- Part 2: Match SWOT Data ---
+    # A SWOT failure only costs the day's ssha_karin, not its MODIS values
+    try:
+        day_results['ssha_karin'] = match_swot_values(date.strftime('%Y%m%d'), group, day_files['ssh'])
+    except Exception as e:
+        print(f"Warning: no ssha_karin for {date}: {e}")
+        day_results['ssha_karin'] = np.nan
+    return day_results
+
+
+def match_swot_values(date_str, group, swot_files_for_day):
+    """
+    ssha_karin for all points of one day with SSHA_METHOD.
+    """
+    if SSHA_METHOD == 'regrid':
+        cells, values = regrid_day(date_str, swot_files_for_day)
+        return lookup_grid_values(cells, values, group['latitude'].values, group['longitude'].values)
+
+    points, tree = load_swot_day(date_str, swot_files_for_day, SWOT_CACHE_DIR,
+                                 store_granules(date_str, swot_files_for_day)) if swot_files_for_day else (None, None)
+
+    if tree is None:
+        return np.nan
+    group_coords = group[['latitude', 'longitude']].values
+    distances, indices = tree.query(group_coords, k=1)
+    return points[indices, 2]
+
+
+def _process_day_isolated(date, group, day_files):
+    """
+    Runs process_day() so that a failure (e.g. a corrupt .nc file) only
+    costs that day: its features are returned as NaN instead of raising.
+    """
+    try:
+        return process_day(date, group, day_files)
+    except Exception as e:
+        print(f"Warning: failed to process {date}: {e}")
+        return pd.DataFrame(np.nan, index=group.index, columns=MODIS_VARS + ['ssha_karin'])
+
+
+def match_environmental_data(training_df, n_workers=N_WORKERS, catalog=None):
+    """
+    Runs process_day() for every date in training_df, either serially
+    (n_workers <= 1) or with one process-pool task per day. Results are
+    concatenated in date order, so both modes give the same output.
+    """
+    # One scan of the data folders replaces per-day globbing and existence checks
+    if catalog is None:
+        catalog = load_catalog(CATALOG_DIRS, CATALOG_FILE)
+    day_groups = [(date, group[['latitude', 'longitude']], find_day_files(catalog, date))
+                  for date, group in training_df.groupby('date')]
+
+    if n_workers is None or n_workers <= 1:
+        all_results = [_process_day_isolated(*day)
+                       for day in tqdm(day_groups, desc="Processing days")]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_process_day_isolated, *day) for day in day_groups]
+            for _ in tqdm(as_completed(futures), total=len(futures), desc=f"Processing days ({n_workers} workers)"):
+                pass
+            all_results = [future.result() for future in futures]
+
+    return pd.concat(all_results)
+
+
+def day_fingerprint(day_files, presence_day):
+    """
+    Fingerprint of everything a day's rows are built from: the name, size and
+    mtime of its MODIS/SWOT files, the SSHA_METHOD and the day's shark
+    presence points.
+    """
+    paths = sorted([day_files[var] for var in MODIS_VARS if var in day_files] + day_files['ssh'])
+    h = hashlib.sha1(json.dumps([SSHA_METHOD] + [file_fingerprint(p) for p in paths]).encode())
+    if len(presence_day):
+        h.update(pd.util.hash_pandas_object(presence_day[['id', 'timestamp', 'latitude', 'longitude']], index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def load_previous_build():
+    """
+    Returns (existing dataset, {YYYYMMDD: fingerprint}) of the last build, or
+    (None, {}) if there is none to extend.
+    """
+    if not os.path.exists(BUILD_MANIFEST) or not os.path.exists(OUTPUT_FILES[0]):
+        return None, {}
+    with open(BUILD_MANIFEST) as f:
+        manifest = json.load(f)
+    existing_df = read_training_dataset(OUTPUT_FILES[0])
+    existing_df = existing_df[[c for c in existing_df.columns if c != 'month']]
+    existing_df['date'] = pd.to_datetime(existing_df['timestamp']).dt.date
+    return existing_df, manifest.get('days', {})
+
+
+def build_training_dataset_optimized(n_workers=N_WORKERS, incremental=INCREMENTAL):
     """
     Main function to load shark data, generate background points,
     and efficiently match all environmental data (including raw SWOT files)
     to create a final training dataset.
+
+    n_workers: number of processes used in Step C (1 = serial).
+    incremental: reuse the rows of days whose fingerprint (source files and
+    presence points, see day_fingerprint) is unchanged since the last build,
+    and only extract new or changed days.
     """
 
     # --- STEP A: LOAD AND CLEAN SHARK DATA ---
     print("--- Step A: Loading and cleaning shark data ---")
 
+    start_date = START_DATE
+    end_date = END_DATE
+
     try:
-        shark_files = glob.glob(os.path.join(SHARK_DATA_DIR, '*.csv'))
-        df_list = [pd.read_csv(f) for f in shark_files]
-        shark_df = pd.concat(df_list, ignore_index=True)
-        print(f"Loaded {len(shark_df)} total rows from {len(shark_files)} file(s).")
+        # Streams only id/date/lat/lon and applies the date window while reading
+        shark_df = load_shark_tracks(SHARK_DATA_DIR, start_date, end_date)
     except Exception as e:
         print(f"Error loading shark data: {e}")
         return
 
-    shark_df.rename(columns={'date': 'timestamp', 'lat': 'latitude', 'lon': 'longitude'},
-                    inplace=True, errors='raise')
-    shark_df['timestamp'] = pd.to_datetime(shark_df['timestamp'])
-
-    start_date = '2014-04-12'
-    end_date = '2015-12-31'
-    shark_df = shark_df[(shark_df['timestamp'] >= start_date) & (shark_df['timestamp'] <= end_date)]
+    shark_df = shark_df.rename(columns={'date': 'timestamp', 'lat': 'latitude', 'lon': 'longitude'})
 
     if shark_df.empty:
         print(f"Warning: No shark tracking data found between {start_date} and {end_date}.")
@@ -54,28 +315,21 @@ def build_training_dataset_optimized():
     print(f"Filtered to {len(shark_df)} shark presence points for the test month.")
 
     shark_df['presence'] = 1
-    presence_points = shark_df[['timestamp', 'latitude', 'longitude', 'presence']].copy()
+    # The tag id is kept for blocked cross-validation (background points have none)
+    presence_points = shark_df[['id', 'timestamp', 'latitude', 'longitude', 'presence']].copy()
 
     # --- STEP B: GENERATE PSEUDO-ABSENCE (BACKGROUND) POINTS ---
     print("\n--- Step B: Generating pseudo-absence (background) points ---")
 
-    num_absence_points = len(presence_points) * 2
-    min_lat, max_lat = presence_points['latitude'].min(), presence_points['latitude'].max()
-    min_lon, max_lon = presence_points['longitude'].min(), presence_points['longitude'].max()
-
-    rand_lat = np.random.uniform(min_lat, max_lat, num_absence_points)
-    rand_lon = np.random.uniform(min_lon, max_lon, num_absence_points)
-
-    time_range = pd.to_datetime(presence_points['timestamp']).astype(np.int64)
-    rand_ts_int = np.random.randint(time_range.min(), time_range.max(), num_absence_points, dtype=np.int64)
-    rand_ts = pd.to_datetime(rand_ts_int)
-
-    absence_points = pd.DataFrame({
-        'timestamp': rand_ts,
-        'latitude': rand_lat,
-        'longitude': rand_lon,
-        'presence': 0
-    })
+    catalog = load_catalog(CATALOG_DIRS, CATALOG_FILE)
+    num_absence_points = len(presence_points) * BACKGROUND_RATIO
+    sampling_days = pd.date_range(presence_points['timestamp'].min().normalize(),
+                                  presence_points['timestamp'].max().normalize(), freq='D').date
+    absence_points = sample_background(presence_points, num_absence_points,
+                                       {date: find_day_files(catalog, date) for date in sampling_days},
+                                       MODIS_VARS + ['ssha_karin'], mode=BACKGROUND_MODE, seed=RANDOM_SEED,
+                                       cache_dir=VALIDITY_MASK_DIR,
+                                       ssha_grid=regrid_day if SSHA_METHOD == 'regrid' else None)
     print(f"Generated {len(absence_points)} background points.")
 
     training_df = pd.concat([presence_points, absence_points], ignore_index=True)
@@ -84,89 +338,45 @@ def build_training_dataset_optimized():
     # --- STEP C: EFFICIENTLY MATCH ALL ENVIRONMENTAL DATA ---
     print("\n--- Step C: Matching environmental data by grouping dates ---")
 
-    all_results = []
-
-    for date, group in tqdm(training_df.groupby('date'), desc="Processing days"):
-
-        # --- Part 1: Match MODIS Data ---
-        daily_modis_data = {}
-        modis_map = {
-            'chlor_a': os.path.join(CHLOR_DIR, f"AQUA_MODIS.{date.strftime('%Y%m%d')}.L3m.DAY.CHL.chlor_a.4km.nc"),
-            'carbon_phyto': os.path.join(CARBON_DIR, f"AQUA_MODIS.{date.strftime('%Y%m%d')}.L4m.DAY.CARBON.carbon_phyto.4km.nc"),
-            'sst': os.path.join(SST_DIR, f"AQUA_MODIS.{date.strftime('%Y%m%d')}.L3m.DAY.SST.sst.4km.nc")
-        }
-
-        for var, file_path in modis_map.items():
-            if os.path.exists(file_path):
-                daily_modis_data[var] = xr.open_dataset(file_path)
-
-        def extract_modis_values(row):
-            features = {}
-            for var, ds in daily_modis_data.items():
-                try:
-                    features[var] = ds[var].sel(lat=row['latitude'], lon=row['longitude'], method='nearest').item()
-                except Exception:
-                    features[var] = np.nan
-            return pd.Series(features)
-
-        day_results = group.apply(extract_modis_values, axis=1)
-
-        for ds in daily_modis_data.values():
-            ds.close()
-
-        # --- Part 2: Match SWOT Data ---
-        # Find all SWOT files that contain the date substring in the filename
-        date_str = date.strftime('%Y%m%d')
-        swot_files_for_day = [f for f in glob.glob(os.path.join(SSH_DIR, '*.nc')) if date_str in os.path.basename(f)]
-
-        if swot_files_for_day:
-            daily_swot_dfs = []
-            for swot_file in swot_files_for_day:
-                with xr.open_dataset(swot_file) as ds:
-                    # Flexible variable detection
-                    ssh_var_candidates = ['ssha_karin', 'ssh_karin', 'ssha', 'ssha_karin_2']
-                    ssh_var = None
-                    for var in ssh_var_candidates:
-                        if var in ds.variables:
-                            ssh_var = var
-                            break
-                    if ssh_var is None:
-                        continue  # skip if no SSH variable found
-
-                    # Flatten lat/lon and variable
-                    df = pd.DataFrame({
-                        'latitude': ds['latitude'].values.ravel(),
-                        'longitude': ds['longitude'].values.ravel(),
-                        'ssha_karin': ds[ssh_var].values.ravel()
-                    }).dropna()
-                    if not df.empty:
-                        daily_swot_dfs.append(df)
-
-            if daily_swot_dfs:
-                combined_swot_day = pd.concat(daily_swot_dfs, ignore_index=True)
-                swot_coords = combined_swot_day[['latitude', 'longitude']].values
-                tree = cKDTree(swot_coords)
-
-                group_coords = group[['latitude', 'longitude']].values
-                distances, indices = tree.query(group_coords, k=1)
-
-                day_results['ssha_karin'] = combined_swot_day['ssha_karin'].iloc[indices].values
-            else:
-                day_results['ssha_karin'] = np.nan
-        else:
-            day_results['ssha_karin'] = np.nan
-        all_results.append(day_results)
-
-    environmental_data = pd.concat(all_results)
-    final_df = training_df.join(environmental_data)
+    existing_df, previous_days = load_previous_build() if incremental else (None, {})
+
+    days = set(training_df['date'])
+    if existing_df is not None:
+        in_window = (existing_df['timestamp'] >= start_date) & (existing_df['timestamp'] <= end_date)
+        days |= set(existing_df.loc[in_window, 'date'])
+    presence_by_day = dict(tuple(presence_points.groupby(presence_points['timestamp'].dt.date)))
+    fingerprints = {
+        date.strftime('%Y%m%d'): day_fingerprint(find_day_files(catalog, date),
+                                                 presence_by_day.get(date, presence_points.iloc[:0]))
+        for date in sorted(days)
+    }
+    unchanged = {date for date in days if previous_days.get(date.strftime('%Y%m%d')) == fingerprints[date.strftime('%Y%m%d')]}
+
+    to_process = training_df[~training_df['date'].isin(unchanged)]
+    if existing_df is not None:
+        print(f"Incremental build: reusing {len(unchanged)} unchanged day(s), extracting {to_process['date'].nunique()} new or changed day(s).")
+
+    if to_process.empty:
+        final_df = existing_df.iloc[:0]
+    else:
+        environmental_data = match_environmental_data(to_process, n_workers=n_workers, catalog=catalog)
+        final_df = to_process.join(environmental_data)
+
+    if existing_df is not None and unchanged:
+        kept_df = existing_df[existing_df['date'].isin(unchanged)]
+        final_df = pd.concat([kept_df, final_df], ignore_index=True)
+        final_df = final_df.sort_values('timestamp', kind='stable').reset_index(drop=True)
 
     print("\n--- Data Matching Complete ---")
     print("Sample of the final training dataset (now including ssha_karin):")
     print(final_df.head())
 
-    output_file = 'training_dataset_one_month.csv'
-    final_df.to_csv(output_file, index=False)
-    print(f"\nSuccessfully created '{output_file}'. You are now ready for model training!")
+    for output_file in OUTPUT_FILES:
+        write_training_dataset(final_df, output_file)
+        print(f"\nSuccessfully created '{output_file}'. You are now ready for model training!")
+
+    with open(BUILD_MANIFEST, 'w') as f:
+        json.dump({'start_date': start_date, 'end_date': end_date, 'days': fingerprints}, f, indent=1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+# --- 1. CONFIGURATION ---
+BASE_DIR = r"D:\NASA_hackathon_2025"
+
+# One URL per line (e.g. matching_links.txt, link.txt or a PO.DAAC download list)
+LINKS_FILE = "matching_links.txt"
+DOWNLOAD_DIR = os.path.join(BASE_DIR, 'downloads')
+
+# Completed downloads (url -> file, size, time); reruns skip them
+MANIFEST_NAME = 'download_manifest.json'
+
+MAX_WORKERS = 8
+# Per host: simultaneous downloads and minimum seconds between request starts
+HOST_CONCURRENCY = 4
+HOST_MIN_INTERVAL = 0.25
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 2.0   # seconds, doubled per attempt (plus jitter)
+BACKOFF_MAX = 120.0
+TIMEOUT = (15, 120)  # connect, read (seconds)
+CHUNK_SIZE = 1024 * 1024
+
+# Earthdata Login keeps credentials (~/.netrc) across its redirects
+AUTH_HOSTS = {'urs.earthdata.nasa.gov'}
+
+
+# --- 2. SCRIPT ---
+
+class EarthdataSession(requests.Session):
+    """
+    A Session that keeps the Authorization header on redirects to and from
+    the Earthdata Login host, which NASA archives (oceandata, PO.DAAC) bounce
+    every download through; requests would otherwise drop it.
+    """
+
+    def rebuild_auth(self, prepared_request, response):
+        original = urlparse(response.request.url).hostname
+        redirect = urlparse(prepared_request.url).hostname
+        if 'Authorization' in prepared_request.headers and (original in AUTH_HOSTS or redirect in AUTH_HOSTS):
+            return
+        # Default handling: strip credentials on other host changes, then apply ~/.netrc
+        super().rebuild_auth(prepared_request, response)
+
+
+class HostLimiter:
+    """
+    Per-host limits shared by all worker threads: at most `concurrency`
+    open downloads per host, and request starts at least `min_interval`
+    seconds apart.
+    """
+
+    def __init__(self, concurrency=HOST_CONCURRENCY, min_interval=HOST_MIN_INTERVAL):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def _slot(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.concurrency)
+            return self._slots[host]
+
+    def acquire(self, host):
+        self._slot(host).acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        time.sleep(start - now)
+
+    def release(self, host):
+        self._slot(host).release()
+
+
+class DownloadManifest:
+    """
+    JSON record of completed downloads, saved after every completion.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def is_done(self, url, dest):
+        entry = self.entries.get(url)
+        return entry is not None and os.path.exists(dest) and os.path.getsize(dest) == entry['size']
+
+    def record(self, url, dest):
+        with self._lock:
+            self.entries[url] = {'file': os.path.basename(dest), 'size': os.path.getsize(dest),
+                                 'completed': datetime.now().isoformat(timespec='seconds')}
+            # A unique temp file, so two downloaders sharing a manifest do not collide
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.entries, f, indent=1)
+                os.replace(tmp_path, self.path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+class RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_local = threading.local()
+
+
+def _session(pool_size):
+    # One session per worker thread, so each keeps its own pooled connections
+    if getattr(_local, 'session', None) is None:
+        session = EarthdataSession()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return _local.session
+
+
+def local_name(url):
+    return os.path.basename(urlparse(url).path)
+
+
+def fetch(session, url, dest):
+    """
+    Downloads url to dest through dest + '.part', resuming a partial file
+    with an HTTP Range request. Returns the number of bytes received.
+    Raises RetryableError for failures worth retrying.
+    """
+    part = dest + '.part'
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+    try:
+        with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 416 and offset:
+                # Range beyond the end: the partial file may already be complete
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == offset:
+                    os.replace(part, dest)
+                    return 0
+                os.remove(part)
+                raise RetryableError("stale partial file discarded")
+            if response.status_code == 429 or response.status_code >= 500:
+                retry_after = response.headers.get('Retry-After')
+                raise RetryableError(f"HTTP {response.status_code}",
+                                     float(retry_after) if retry_after and retry_after.isdigit() else None)
+            response.raise_for_status()
+            if 'text/html' in response.headers.get('Content-Type', '') and not url.endswith(('.html', '.htm')):
+                raise ValueError("server returned an HTML page instead of the file (Earthdata login missing?)")
+
+            if offset and response.status_code != 206:
+                offset = 0  # the server ignored the Range header; start over
+            expected = response.headers.get('Content-Length')
+            expected = offset + int(expected) if expected and expected.isdigit() else None
+
+            received = 0
+            with open(part, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+    except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+        raise RetryableError(str(e))
+
+    if expected is not None and os.path.getsize(part) != expected:
+        raise RetryableError(f"incomplete: {os.path.getsize(part)} of {expected} bytes")
+    os.replace(part, dest)
+    return received
+
+
+def download_one(url, dest, limiter, pool_size=HOST_CONCURRENCY):
+    """
+    Downloads one URL with per-host limits and exponential-backoff retries.
+    Returns the number of bytes received; raises after MAX_RETRIES attempts.
+    """
+    host = urlparse(url).hostname
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire(host)
+        try:
+            return fetch(_session(pool_size), url, dest)
+        except RetryableError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = e.retry_after or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random())
+            tqdm.write(f"Retrying {local_name(url)} in {delay:.1f} s ({e})")
+        finally:
+            limiter.release(host)
+        time.sleep(delay)
+
+
+def download_all(urls, download_dir=DOWNLOAD_DIR, max_workers=MAX_WORKERS, limiter=None):
+    """
+    Downloads urls into download_dir with a bounded thread pool, skipping
+    those already recorded in the manifest. Returns (downloaded, skipped,
+    failed), where failed maps url -> error message.
+    """
+    os.makedirs(download_dir, exist_ok=True)
+    manifest = DownloadManifest(os.path.join(download_dir, MANIFEST_NAME))
+    limiter = limiter or HostLimiter()
+    urls = list(dict.fromkeys(urls))
+
+    todo = [url for url in urls if not manifest.is_done(url, os.path.join(download_dir, local_name(url)))]
+    skipped = len(urls) - len(todo)
+    print(f"{len(urls)} link(s): {skipped} already downloaded, {len(todo)} to fetch with {max_workers} workers")
+
+    downloaded, failed, total_bytes = 0, {}, 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(download_one, url, os.path.join(download_dir, local_name(url)), limiter): url
+                   for url in todo}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Downloading"):
+            url = futures[future]
+            try:
+                total_bytes += future.result()
+                manifest.record(url, os.path.join(download_dir, local_name(url)))
+                downloaded += 1
+            except Exception as e:
+                failed[url] = str(e)
+                tqdm.write(f"❌ Failed: {url} | Error: {e}")
+
+    print(f"\nDownloaded {downloaded} file(s) ({total_bytes / 1e6:.1f} MB), skipped {skipped}, failed {len(failed)}.")
+    return downloaded, skipped, failed
+
+
+def read_links(links_file):
+    with open(links_file, "r") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+if __name__ == "__main__":
+    # Usage: python bulk_downloader.py [links.txt] [download_dir]
+    links_file = sys.argv[1] if len(sys.argv) > 1 else LINKS_FILE
+    download_dir = sys.argv[2] if len(sys.argv) > 2 else DOWNLOAD_DIR
+    download_all(read_links(links_file), download_dir)
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import tempfile
+import numpy as np
+from datetime import datetime, date as date_cls, timedelta
+
+# --- 1. CONFIGURATION: UPDATE THESE PATHS ---
+BASE_DIR = r"D:\NASA_hackathon_2025"
+
+# Data folders indexed by default, keyed by the label used for lookups
+CATALOG_DIRS = {
+    'chlor_a': os.path.join(BASE_DIR, 'chlorophyll'),
+    'carbon_phyto': os.path.join(BASE_DIR, 'pythoplankton'),
+    'sst': os.path.join(BASE_DIR, 'SST'),
+    'ssh': os.path.join(BASE_DIR, 'SSH'),
+}
+
+# Index shared by every script; folders are stored by absolute path
+CATALOG_FILE = os.path.join(BASE_DIR, 'file_catalog.json')
+
+CATALOG_VERSION = 1
+
+# Suite of the daily 4km MODIS file of each variable (NSST, the nighttime
+# SST suite, also has the product 'sst')
+MODIS_SUITES = {'chlor_a': 'CHL', 'carbon_phyto': 'CARBON', 'sst': 'SST'}
+
+# AQUA_MODIS.20140101.L3m.DAY.CHL.chlor_a.4km.nc
+MODIS_PATTERN = re.compile(
+    r'^(?P<mission>[A-Z]+_MODIS)\.(?P<date>\d{8})\.(?P<level>L\d\w*)\.(?P<period>\w+)\.'
+    r'(?P<suite>\w+)\.(?P<product>\w+)\.(?P<resolution>\w+?)(?:\.\w+)*\.nc$')
+
+# SWOT_L2_LR_SSH_Expert_032_166_20250503T222059_20250503T231127_PIC2_01.nc
+SWOT_PATTERN = re.compile(
+    r'^SWOT_(?P<level>L\d\w*?)_LR_SSH_(?P<variant>[A-Za-z]+)_(?P<cycle>\d{3})_(?P<pass>\d{3})_'
+    r'(?P<start>\d{8}T\d{6})_(?P<end>\d{8}T\d{6})_(?P<crid>\w+?)_(?P<counter>\d{2})\.nc$')
+
+
+# --- 2. SCRIPT ---
+
+def parse_modis_filename(filename):
+    """
+    Parses an OB.DAAC MODIS L3m/L4m filename into its fields, or returns None.
+    """
+    m = MODIS_PATTERN.match(os.path.basename(filename))
+    if m is None:
+        return None
+    fields = m.groupdict()
+    fields['source'] = 'MODIS'
+    fields['start'] = fields['end'] = datetime.strptime(fields['date'], '%Y%m%d').isoformat()
+    fields['dates'] = [fields.pop('date')]
+    return fields
+
+
+def parse_swot_filename(filename):
+    """
+    Parses a SWOT L2 LR SSH granule filename into its fields, or returns None.
+    A granule crossing midnight is listed under every date it covers.
+    """
+    m = SWOT_PATTERN.match(os.path.basename(filename))
+    if m is None:
+        return None
+    fields = m.groupdict()
+    start = datetime.strptime(fields['start'], '%Y%m%dT%H%M%S')
+    end = datetime.strptime(fields['end'], '%Y%m%dT%H%M%S')
+    fields.update({
+        'source': 'SWOT',
+        'product': 'ssh',
+        'cycle': int(fields['cycle']),
+        'pass': int(fields['pass']),
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'dates': [(start.date() + timedelta(days=i)).strftime('%Y%m%d')
+                  for i in range((end.date() - start.date()).days + 1)],
+    })
+    return fields
+
+
+def modis_fields(var):
+    """
+    Field values selecting the daily 4km MODIS files of var, for
+    FileCatalog.entries() and files_for().
+    """
+    return {'product': var, 'suite': MODIS_SUITES[var], 'period': 'DAY', 'resolution': '4km'}
+
+
+def parse_filename(filename):
+    """
+    Parses a MODIS or SWOT filename, or returns None for anything else.
+    """
+    return parse_modis_filename(filename) or parse_swot_filename(filename)
+
+
+def date_key(date):
+    """
+    Normalises a date, datetime, Timestamp or 'YYYYMMDD'/'YYYY-MM-DD' string to 'YYYYMMDD'.
+    """
+    if isinstance(date, str):
+        return date.replace('-', '')[:8]
+    if not isinstance(date, date_cls) and hasattr(date, 'date'):
+        date = date.date()
+    return date.strftime('%Y%m%d')
+
+
+def date_bitmap(days, file_dates):
+    """
+    True for each of days (dates, Timestamps or a DatetimeIndex) that is in
+    file_dates (anything date_key accepts).
+    """
+    keys = {date_key(d) for d in file_dates}
+    return np.array([date_key(d) in keys for d in days], dtype=bool)
+
+
+class FileCatalog:
+    """
+    One-pass index of the environmental data folders.
+
+    Each folder is listed once per refresh(); entries whose size and mtime
+    are unchanged are reused from the index file instead of being re-parsed.
+    Lookups by (label, date) are dictionary hits.
+    """
+
+    def __init__(self, dirs=None, index_file=CATALOG_FILE):
+        self.dirs = dict(CATALOG_DIRS if dirs is None else dirs)
+        self.index_file = index_file
+        self._folders = {}
+        self._by_date = {}
+        self._load_index()
+
+    def _load_index(self):
+        if self.index_file and os.path.exists(self.index_file):
+            try:
+                with open(self.index_file) as f:
+                    index = json.load(f)
+                if index.get('version') == CATALOG_VERSION:
+                    self._folders = index['folders']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: ignoring unreadable catalog index {self.index_file}: {e}")
+
+    def _save_index(self):
+        # Merge with the folders other scripts wrote since we loaded
+        folders = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file) as f:
+                    index = json.load(f)
+                if index.get('version') == CATALOG_VERSION:
+                    folders = index['folders']
+            except (OSError, ValueError, KeyError):
+                pass
+        for folder in self.dirs.values():
+            key = os.path.abspath(folder)
+            if key in self._folders:
+                folders[key] = self._folders[key]
+
+        # A unique temp file, so scripts refreshing the catalog at once do not collide
+        tmp_file = None
+        try:
+            fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.index_file)), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': CATALOG_VERSION, 'folders': folders}, f, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"Warning: could not save the catalog index {self.index_file}: {e}")
+            if tmp_file is not None and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def refresh(self, save=True):
+        """
+        Lists every folder once, parses new or changed files and rebuilds the
+        date lookup. Returns self.
+        """
+        changed = False
+        for folder in self.dirs.values():
+            key = os.path.abspath(folder)
+            old_files = self._folders.get(key, {})
+            new_files = {}
+            if os.path.isdir(folder):
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                        old = old_files.get(entry.name)
+                        if old is not None and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+                            new_files[entry.name] = old
+                            continue
+                        fields = parse_filename(entry.name)
+                        if fields is None:
+                            continue
+                        fields.update({'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+                        new_files[entry.name] = fields
+            if new_files != old_files:
+                changed = True
+            self._folders[key] = new_files
+
+        self._build_date_index()
+        if save and changed and self.index_file:
+            self._save_index()
+        return self
+
+    def _build_date_index(self):
+        self._by_date = {}
+        for label, folder in self.dirs.items():
+            folder = os.path.abspath(folder)
+            by_date = self._by_date.setdefault(label, {})
+            for name, fields in self._folders.get(folder, {}).items():
+                for day in fields['dates']:
+                    by_date.setdefault(day, []).append(name)
+            for names in by_date.values():
+                names.sort()
+
+    def entries(self, label, date=None, **match):
+        """
+        Returns (path, fields) pairs for a folder label, optionally restricted
+        to one date and to entries whose fields equal the given keyword values
+        (e.g. period='DAY', variant='Expert').
+        """
+        folder = os.path.abspath(self.dirs[label])
+        files = self._folders.get(folder, {})
+        names = self._by_date.get(label, {}).get(date_key(date), []) if date is not None else sorted(files)
+        result = []
+        for name in names:
+            fields = files[name]
+            if all(fields.get(k) == v for k, v in match.items()):
+                result.append((os.path.join(self.dirs[label], name), fields))
+        return result
+
+    def files_for(self, label, date, **match):
+        """
+        Returns the paths of the files in a folder label covering one date.
+        """
+        return [path for path, _ in self.entries(label, date, **match)]
+
+    def dates(self, label):
+        """
+        Returns the sorted datetime.date values that have at least one file.
+        """
+        return sorted(datetime.strptime(d, '%Y%m%d').date() for d in self._by_date.get(label, {}))
+
+
+def load_catalog(dirs=None, index_file=CATALOG_FILE):
+    """
+    Opens the catalog index and refreshes it against the folders on disk.
+    """
+    return FileCatalog(dirs, index_file).refresh()
+
+
+if __name__ == "__main__":
+    catalog = load_catalog()
+    for label, folder in catalog.dirs.items():
+        days = catalog.dates(label)
+        span = f"{days[0]} to {days[-1]}" if days else "no files"
+        print(f"{label:>13}: {len(catalog.entries(label))} files, {len(days)} dates ({span}) in {folder}")
@@ -0,0 +1,139 @@
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+
+# --- CONFIGURATION ---
+# Total worker threads shared by folds and trees; -1 uses every core
+N_JOBS = -1
+
+# Threads allowed per core when folds are split across processes (1.0 = no
+# oversubscription); extra threads only help if some folds finish early
+OVERSUBSCRIPTION = 1.0
+
+
+# --- SCRIPT ---
+
+def _n_cores(n_jobs):
+    cores = os.cpu_count() or 1
+    return cores if n_jobs is None or n_jobs < 0 else max(1, min(n_jobs, cores))
+
+
+def split_workers(n_tasks, n_jobs=N_JOBS, oversubscription=OVERSUBSCRIPTION):
+    """
+    Splits the cores between parallel fold processes and tree threads per
+    fold, so that processes * threads stays within cores * oversubscription.
+    Returns (fold_jobs, tree_jobs).
+    """
+    cores = _n_cores(n_jobs)
+    fold_jobs = max(1, min(n_tasks, cores))
+    tree_jobs = max(1, int(cores * oversubscription) // fold_jobs)
+    return fold_jobs, tree_jobs
+
+
+def _rows(X, idx):
+    # DataFrames are kept so that fitted models remember the feature names
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+
+def _fit_fold(model, X, y, train_idx, test_idx, fold):
+    start = time.perf_counter()
+    model.fit(_rows(X, train_idx), y[train_idx])
+    if test_idx is None:
+        return {'fold': fold, 'model': model, 'seconds': time.perf_counter() - start}
+
+    proba = model.predict_proba(_rows(X, test_idx))[:, 1]
+    return {
+        'fold': fold,
+        'n_train': len(train_idx),
+        'n_test': len(test_idx),
+        'train_positive': int(y[train_idx].sum()),
+        'test_positive': int(y[test_idx].sum()),
+        'auc': roc_auc_score(y[test_idx], proba) if len(np.unique(y[test_idx])) > 1 else np.nan,
+        'importances': model.feature_importances_,
+        'test_idx': test_idx,
+        'proba': proba,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def cross_validate(model, X, y, splits, n_jobs=N_JOBS, refit=True, oversubscription=OVERSUBSCRIPTION):
+    """
+    Fits and scores a copy of model on every (train_idx, test_idx) split.
+    Folds run in parallel processes and each forest gets the remaining
+    cores as tree threads (see split_workers). With refit=True the final
+    model on all rows is fitted in the same pool, next to the folds.
+
+    Returns (fold_results, final_model), where each fold result holds the
+    fold number, row and positive counts, auc, importances, the test rows
+    with their predicted probabilities (test_idx, proba) and seconds (wall
+    time of the fit and scoring).
+    """
+    y = np.asarray(y)
+    tasks = [(train_idx, test_idx, fold) for fold, (train_idx, test_idx) in enumerate(splits)]
+    if refit:
+        # The largest fit goes first, so it is not the straggler
+        tasks.insert(0, (np.arange(len(y)), None, 'final'))
+
+    fold_jobs, tree_jobs = split_workers(len(tasks), n_jobs, oversubscription)
+    print(f"Running {len(tasks)} fit(s) on {fold_jobs} process(es) x {tree_jobs} tree thread(s)")
+    results = Parallel(n_jobs=fold_jobs)(
+        delayed(_fit_fold)(clone(model).set_params(n_jobs=tree_jobs), X, y, *task) for task in tasks)
+
+    if not refit:
+        return results, None
+    final = results.pop(0)
+    print(f"Final model fitted in {final['seconds']:.1f} s")
+    return results, final['model'].set_params(n_jobs=model.n_jobs)
+
+
+def evaluate_models(models, X, y, splits, n_jobs=N_JOBS, oversubscription=OVERSUBSCRIPTION):
+    """
+    Cross-validates several models on the same splits in one pool, with
+    every (model, fold) pair as a task. Returns one list of fold results
+    (as in cross_validate) per model.
+    """
+    y = np.asarray(y)
+    splits = list(splits)
+    tasks = [(m, train_idx, test_idx, fold) for m in range(len(models))
+             for fold, (train_idx, test_idx) in enumerate(splits)]
+
+    fold_jobs, tree_jobs = split_workers(len(tasks), n_jobs, oversubscription)
+    results = Parallel(n_jobs=fold_jobs)(
+        delayed(_fit_fold)(clone(models[m]).set_params(n_jobs=tree_jobs), X, y, train_idx, test_idx, fold)
+        for m, train_idx, test_idx, fold in tasks)
+
+    per_model = [[] for _ in models]
+    for (m, *_), result in zip(tasks, results):
+        per_model[m].append(result)
+    return per_model
+
+
+def oob_evaluate(model, X, y, n_jobs=N_JOBS):
+    """
+    Fits model once on all rows with out-of-bag scoring and returns
+    (oob_auc, fitted_model, seconds). Each row is scored only by the trees
+    that did not see it, which gives a cross-validation-like estimate
+    without refitting, and the fitted model doubles as the final model.
+    """
+    y = np.asarray(y)
+    fitted = clone(model).set_params(oob_score=True, bootstrap=True, n_jobs=_n_cores(n_jobs))
+    start = time.perf_counter()
+    fitted.fit(X, y)
+    seconds = time.perf_counter() - start
+
+    oob_proba = fitted.oob_decision_function_[:, 1]
+    scored = np.isfinite(oob_proba)  # rows drawn into every bootstrap have no OOB estimate
+    return roc_auc_score(y[scored], oob_proba[scored]), fitted.set_params(n_jobs=model.n_jobs), seconds
+
+
+def default_forest(**params):
+    """
+    The random forest used across the project scripts, with params overriding the defaults.
+    """
+    settings = dict(n_estimators=200, random_state=42, n_jobs=-1, class_weight="balanced")
+    settings.update(params)
+    return RandomForestClassifier(**settings)
@@ -0,0 +1,289 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from build_ml_dataset_optimized import (BASE_DIR, SHARK_DATA_DIR, CATALOG_DIRS, CATALOG_FILE, START_DATE, END_DATE,
+                                        MODIS_VARS, SSHA_METHOD, SWOT_CACHE_DIR, VALIDITY_MASK_DIR,
+                                        BACKGROUND_RATIO, nearest_grid_index, regrid_day, store_granules)
+from background_sampler import daily_validity_mask
+from catalog import MODIS_SUITES, date_bitmap, load_catalog, modis_fields, parse_modis_filename, parse_swot_filename
+from nc_integrity import REPORT_FILE, load_report
+from shark_tracks import load_shark_tracks
+from swot_cache import file_fingerprint, load_swot_day, write_npz_cache
+from swot_links import SSH_VARIANTS, filter_swot_links, load_pass_footprints, study_area_passes
+from swot_regrid import GRID_NLAT, GRID_NLON, MAX_DISTANCE_KM, lookup_grid_values
+
+# --- 1. CONFIGURATION ---
+PRODUCTS = MODIS_VARS + ['ssha_karin']
+
+# Download lists to pick the missing files from (MODIS and PO.DAAC SWOT)
+LINK_FILES = [os.path.join(BASE_DIR, 'link.txt'), os.path.join(BASE_DIR, '0036416425-download.txt')]
+SWOT_VARIANTS = ['Expert']
+PASS_FOOTPRINTS_FILE = os.path.join(BASE_DIR, 'swot_pass_footprints.json')
+
+# Outputs: per-day coverage table and the download list, most needed dates first
+COVERAGE_REPORT_FILE = 'coverage_report.csv'
+DOWNLOAD_LIST_FILE = 'coverage_download_list.txt'
+
+# ssha_karin validity masks of the study box (MODIS masks are shared with
+# background_sampler in VALIDITY_MASK_DIR)
+SSHA_MASK_DIR = os.path.join(BASE_DIR, 'coverage_masks')
+MASK_VERSION = 1
+
+
+# --- 2. SCRIPT ---
+
+def usable(path, report):
+    """
+    False if the integrity report (see nc_integrity.py) has the current
+    version of the file as unreadable or without valid values.
+    """
+    entry = report.get(os.path.abspath(path))
+    if entry is None or entry['fingerprint'] != file_fingerprint(path):
+        return True
+    return entry['openable'] and not entry['error'] and entry['n_valid'] != 0
+
+
+def product_dates(catalog, report):
+    """
+    Dates ('YYYYMMDD') with at least one usable file, per product, using the
+    same file selection as the dataset builder.
+    """
+    dates = {}
+    for var in MODIS_VARS:
+        dates[var] = {d for path, fields in catalog.entries(var, **modis_fields(var))
+                      if usable(path, report) for d in fields['dates']}
+    dates['ssha_karin'] = {d for path, fields in catalog.entries('ssh', source='SWOT')
+                           if fields['variant'] in SSH_VARIANTS and usable(path, report) for d in fields['dates']}
+    return dates
+
+
+def usable_day_files(catalog, date, report):
+    """
+    find_day_files() restricted to usable files: the first usable MODIS file
+    per variable and the usable SWOT granules of one date.
+    """
+    day_files = {}
+    for var in MODIS_VARS:
+        paths = [p for p in catalog.files_for(var, date, **modis_fields(var)) if usable(p, report)]
+        if paths:
+            day_files[var] = paths[0]
+    day_files['ssh'] = [p for p in catalog.files_for('ssh', date) if usable(p, report)]
+    return day_files
+
+
+def box_grid(bounds):
+    """
+    Cell centres of the MODIS 4km grid inside bounds, used for ssha_karin on
+    days without a MODIS file.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds
+    lat = 90.0 - (np.arange(GRID_NLAT) + 0.5) * 180.0 / GRID_NLAT
+    lon = -180.0 + (np.arange(GRID_NLON) + 0.5) * 360.0 / GRID_NLON
+    return lat[(lat >= min_lat) & (lat <= max_lat)], lon[(lon >= min_lon) & (lon <= max_lon)]
+
+
+def ssha_validity_mask(date_str, swot_files, lat, lon, cache_dir=SSHA_MASK_DIR):
+    """
+    True for the cells of the (lat, lon) grid that get an ssha_karin value
+    with the builder's SSHA_METHOD. Cached as packed bits, keyed by the
+    granules, the grid and the method.
+    """
+    key = hashlib.sha1(json.dumps([MASK_VERSION, SSHA_METHOD, MAX_DISTANCE_KM, lat[[0, -1]].tolist(),
+                                   lon[[0, -1]].tolist(), len(lat), len(lon)] +
+                                  [file_fingerprint(p) for p in sorted(swot_files)]).encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, f'ssha_{date_str}_{key[:12]}.npz')
+    if os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as cached:
+                return np.unpackbits(cached['mask'], count=len(lat) * len(lon)).astype(bool).reshape(len(lat), len(lon))
+        except Exception as e:
+            print(f"Warning: rebuilding unreadable ssha mask {cache_file}: {e}")
+
+    if SSHA_METHOD == 'regrid':
+        cells, values = regrid_day(date_str, swot_files)
+        lat_grid, lon_grid = np.meshgrid(lat, lon, indexing='ij')
+        mask = np.isfinite(lookup_grid_values(cells, values, lat_grid.ravel(), lon_grid.ravel()))
+        mask = mask.reshape(len(lat), len(lon))
+    else:
+        # The nearest swath point is taken at any distance: every cell has a value
+        _, tree = load_swot_day(date_str, swot_files, SWOT_CACHE_DIR, store_granules(date_str, swot_files))
+        mask = np.full((len(lat), len(lon)), tree is not None)
+
+    write_npz_cache(cache_file, mask=np.packbits(mask.ravel()))
+    return mask
+
+
+def product_mask(product, date_str, day_files, bounds, grid=None):
+    """
+    (lat, lon, mask) of the cells of the study box where product is valid on
+    one day, or None if the day has no file for it. ssha_karin is evaluated
+    on grid (the MODIS grid of the day) when given.
+    """
+    if product != 'ssha_karin':
+        return daily_validity_mask(day_files, [product], bounds, VALIDITY_MASK_DIR)
+    if not day_files['ssh']:
+        return None
+    lat, lon = grid if grid is not None else box_grid(bounds)
+    return lat, lon, ssha_validity_mask(date_str, day_files['ssh'], lat, lon)
+
+
+def day_coverage(date, day_files, bounds, points):
+    """
+    Coverage of one day over the study box: the fraction of box cells with a
+    valid value per product and for all products together, and whether each
+    of points (latitude, longitude arrays) gets a valid value per product.
+    Land cells are never valid, so fractions are of the whole box.
+    """
+    date_str = pd.Timestamp(date).strftime('%Y%m%d')
+    fractions, point_valid = {}, {}
+    masks = []
+    grid = None
+    for product in PRODUCTS:
+        try:
+            day_mask = product_mask(product, date_str, day_files, bounds, grid)
+        except Exception as e:
+            # An unreadable file counts as missing
+            print(f"Warning: no {product} coverage for {date}: {e}")
+            day_mask = None
+        if day_mask is None:
+            fractions[product], point_valid[product] = 0.0, np.zeros(len(points[0]), dtype=bool)
+            continue
+        lat, lon, mask = day_mask
+        if grid is None:
+            grid = (lat, lon)
+        fractions[product] = float(mask.mean()) if mask.size else 0.0
+        point_valid[product] = mask[nearest_grid_index(lat, points[0]), nearest_grid_index(lon, points[1])] \
+            if mask.size and len(points[0]) else np.zeros(len(points[0]), dtype=bool)
+        masks.append(mask)
+
+    same_grid = len(masks) == len(PRODUCTS) and len({m.shape for m in masks}) == 1
+    complete = np.logical_and.reduce(masks) if same_grid else None
+    fractions['complete'] = float(complete.mean()) if complete is not None and complete.size else 0.0
+    return fractions, point_valid
+
+
+def analyze_coverage(presence_points, catalog, report=None):
+    """
+    Coverage of every product over the days spanned by presence_points
+    (timestamp, latitude, longitude) and their bounding box.
+
+    Returns (daily, point_valid): daily has one row per day with the number
+    of presence points, a date bitmap column per product (a usable file
+    exists), the valid fraction of the box per product and for all of them;
+    point_valid has one boolean column per product for each presence point.
+    """
+    report = load_report(REPORT_FILE) if report is None else report
+    days = pd.date_range(presence_points['timestamp'].min().normalize(),
+                         presence_points['timestamp'].max().normalize(), freq='D')
+    bounds = (presence_points['latitude'].min(), presence_points['latitude'].max(),
+              presence_points['longitude'].min(), presence_points['longitude'].max())
+
+    daily = pd.DataFrame(index=days)
+    point_days = presence_points['timestamp'].dt.normalize()
+    daily['n_presence'] = point_days.value_counts().reindex(days, fill_value=0).values
+    for product, dates in product_dates(catalog, report).items():
+        daily[f'{product}_file'] = date_bitmap(days, dates)
+
+    point_valid = pd.DataFrame(False, index=presence_points.index, columns=PRODUCTS)
+    fractions = []
+    for day in days:
+        if not daily.loc[day, [f'{p}_file' for p in PRODUCTS]].any():
+            fractions.append({p: 0.0 for p in PRODUCTS + ['complete']})
+            continue
+        day_files = usable_day_files(catalog, day.date(), report)
+        on_day = point_days == day
+        day_points = presence_points.loc[on_day]
+        day_fractions, day_valid = day_coverage(day, day_files, bounds,
+                                                (day_points['latitude'].to_numpy(), day_points['longitude'].to_numpy()))
+        for product in PRODUCTS:
+            point_valid.loc[on_day, product] = day_valid[product]
+        fractions.append(day_fractions)
+
+    fractions = pd.DataFrame(fractions, index=days)
+    for column in fractions.columns:
+        daily[f'{column}_fraction'] = fractions[column]
+    return daily, point_valid
+
+
+def download_list(daily, bounds, link_files=LINK_FILES, swot_files=()):
+    """
+    URLs of the files missing from daily (see analyze_coverage), in priority
+    order: dates with the most presence points first. SWOT granules are
+    restricted to SWOT_VARIANTS and to passes that may cross bounds.
+    Returns (urls, unavailable), where unavailable lists the (product, date)
+    pairs that no link provides.
+    """
+    missing = {(product, day.strftime('%Y%m%d')) for product in PRODUCTS
+               for day in daily.index[~daily[f'{product}_file'].to_numpy()]}
+    priority = {day.strftime('%Y%m%d'): n for day, n in daily['n_presence'].items()}
+
+    links = []
+    for link_file in link_files:
+        if os.path.exists(link_file):
+            with open(link_file) as f:
+                links.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    footprints = load_pass_footprints(swot_files, PASS_FOOTPRINTS_FILE) if swot_files else {}
+    outside_passes = set(footprints) - study_area_passes(footprints, bounds)
+    swot_kept = set(filter_swot_links(links, SWOT_VARIANTS, exclude_passes=outside_passes)[0])
+
+    selected, provided = [], set()
+    for url in dict.fromkeys(links):
+        name = url.rstrip('/').split('/')[-1]
+        fields = parse_modis_filename(name)
+        if fields is not None:
+            if fields['period'] != 'DAY' or fields['resolution'] != '4km' or \
+                    fields['suite'] != MODIS_SUITES.get(fields['product']):
+                continue
+            needed = [(fields['product'], d) for d in fields['dates'] if (fields['product'], d) in missing]
+        elif url in swot_kept:
+            needed = [('ssha_karin', d) for d in parse_swot_filename(name)['dates'] if ('ssha_karin', d) in missing]
+        else:
+            continue
+        if needed:
+            selected.append((-max(priority[d] for _, d in needed), min(d for _, d in needed), url))
+            provided.update(needed)
+
+    urls = [url for _, _, url in sorted(selected)]
+    unavailable = sorted(missing - provided, key=lambda item: (-priority[item[1]], item[1], item[0]))
+    return urls, unavailable
+
+
+def print_summary(daily, point_valid):
+    n_days = len(daily)
+    print(f"\n--- Coverage of {n_days} day(s), {len(point_valid)} presence points ---")
+    for product in PRODUCTS:
+        print(f"{product:>13}: files on {daily[f'{product}_file'].sum()}/{n_days} days, "
+              f"mean valid fraction of the box {daily[f'{product}_fraction'].mean():.1%}, "
+              f"valid at {point_valid[product].mean():.1%} of presence points")
+    presence_complete = point_valid.all(axis=1).mean() if len(point_valid) else 0.0
+    # Background points are drawn only from cells with every feature (see background_sampler)
+    expected = (presence_complete + BACKGROUND_RATIO) / (1 + BACKGROUND_RATIO)
+    print(f"Presence points with complete features: {presence_complete:.1%}")
+    print(f"Training points expected with complete features: {expected:.1%}")
+
+
+if __name__ == "__main__":
+    shark_df = load_shark_tracks(SHARK_DATA_DIR, START_DATE, END_DATE)
+    presence = shark_df.rename(columns={'date': 'timestamp', 'lat': 'latitude', 'lon': 'longitude'})
+    if presence.empty:
+        print(f"No shark tracking data found between {START_DATE} and {END_DATE}.")
+    else:
+        catalog = load_catalog(CATALOG_DIRS, CATALOG_FILE)
+        daily, point_valid = analyze_coverage(presence, catalog)
+        daily.to_csv(COVERAGE_REPORT_FILE, index_label='date')
+        print_summary(daily, point_valid)
+
+        bounds = (presence['latitude'].min(), presence['latitude'].max(),
+                  presence['longitude'].min(), presence['longitude'].max())
+        local_swot = [path for path, _ in catalog.entries('ssh', source='SWOT')]
+        urls, unavailable = download_list(daily, bounds, swot_files=local_swot)
+        with open(DOWNLOAD_LIST_FILE, 'w') as f:
+            for url in urls:
+                f.write(url + '\n')
+        print(f"\n{len(urls)} file(s) to download written to {DOWNLOAD_LIST_FILE}")
+        if unavailable:
+            print(f"{len(unavailable)} missing product-day(s) have no link, e.g. {unavailable[:5]}")
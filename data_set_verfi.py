@@ -1,11 +1,11 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
+from dataset_io import read_training_dataset
 
 # Load your CSV file
-csv_file = "training_dataset_07.csv"  # Replace with your file path
-df = pd.read_csv(csv_file, parse_dates=['timestamp'])
+csv_file = "training_dataset_07.csv"  # Replace with your file path (Parquet dataset or .csv)
+df = read_training_dataset(csv_file, columns=['timestamp', 'latitude', 'longitude', 'presence'])
 
 # Filter for presence = 1 (markers) and presence = 0 (no markers)
 present = df[df['presence'] == 1]
@@ -0,0 +1,140 @@
+import os
+import shutil
+import pandas as pd
+
+# --- CONFIGURATION ---
+FEATURES = ['chlor_a', 'carbon_phyto', 'sst', 'ssha_karin']
+
+# Column dtypes of the training dataset on disk
+COLUMN_DTYPES = {
+    'id': 'string',
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'presence': 'int8',
+    **{f: 'float32' for f in FEATURES},
+}
+
+PARTITION_COLUMN = 'month'
+
+
+# --- SCRIPT ---
+
+def is_parquet_path(path):
+    """
+    True for a partitioned Parquet dataset directory or a single .parquet file.
+    """
+    return os.path.isdir(path) or path.endswith('.parquet')
+
+
+def _normalise_dtypes(df):
+    df = df.copy()
+    df['timestamp'] = pd.to_datetime(df['timestamp']).astype('datetime64[ns]')
+    if 'date' in df.columns:
+        df['date'] = df['timestamp'].dt.normalize()
+    for col, dtype in COLUMN_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def write_training_dataset(df, path):
+    """
+    Writes the training dataset. A path ending in .csv is written as CSV;
+    anything else becomes a Parquet dataset partitioned by month
+    (path/month=YYYY-MM/*.parquet) with float32 features, datetime64
+    timestamps and int8 presence. The dataset is written to a sibling
+    directory and swapped in, so it replaces any earlier dataset at path as
+    a whole (months no longer in df are dropped).
+    """
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+        return
+
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+
+    df = _normalise_dtypes(df)
+    df[PARTITION_COLUMN] = df['timestamp'].dt.strftime('%Y-%m')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    path = path.rstrip('/\\')
+    tmp_path, old_path = path + '.tmp', path + '.old'
+    for leftover in (tmp_path, old_path):
+        if os.path.exists(leftover):
+            shutil.rmtree(leftover)
+    pds.write_dataset(
+        table, tmp_path, format='parquet',
+        partitioning=pds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor='hive')
+    )
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+
+def dataset_columns(path):
+    """
+    Column names of a training dataset, read from the schema or CSV header only.
+    """
+    if not is_parquet_path(path):
+        return list(pd.read_csv(path, nrows=0).columns)
+
+    import pyarrow.dataset as pds
+
+    return [c for c in pds.dataset(path, format='parquet', partitioning='hive').schema.names if c != PARTITION_COLUMN]
+
+
+def read_training_dataset(path, columns=None, start=None, end=None):
+    """
+    Reads the training dataset written by write_training_dataset().
+
+    columns: only these columns are read (all if None).
+    start / end: inclusive timestamp bounds; for Parquet only the matching
+    month partitions and row groups are scanned.
+    CSV files are still accepted, so older exports keep working.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    if not is_parquet_path(path):
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + (['timestamp'] if start is not None or end is not None else [])))
+        dtypes = {c: t for c, t in COLUMN_DTYPES.items() if usecols is None or c in usecols}
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes,
+                         parse_dates=['timestamp'] if usecols is None or 'timestamp' in usecols else False)
+        if start is not None:
+            df = df[df['timestamp'] >= start]
+        if end is not None:
+            df = df[df['timestamp'] <= end]
+        return df[list(columns)].reset_index(drop=True) if columns is not None else df.reset_index(drop=True)
+
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+
+    dataset = pds.dataset(path, format='parquet', partitioning='hive')
+    # Month partitions are filtered by value, then rows by timestamp
+    filters = []
+    if start is not None:
+        filters.append(pds.field(PARTITION_COLUMN) >= start.strftime('%Y-%m'))
+        filters.append(pds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('ns')))
+    if end is not None:
+        filters.append(pds.field(PARTITION_COLUMN) <= end.strftime('%Y-%m'))
+        filters.append(pds.field('timestamp') <= pa.scalar(end.to_pydatetime(), pa.timestamp('ns')))
+    expression = None
+    for f in filters:
+        expression = f if expression is None else expression & f
+
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != PARTITION_COLUMN]
+    table = dataset.to_table(columns=list(columns), filter=expression)
+    return table.to_pandas()
+
+
+def export_csv(path, csv_path, columns=None, start=None, end=None):
+    """
+    Exports (part of) a Parquet training dataset to CSV.
+    """
+    read_training_dataset(path, columns, start, end).to_csv(csv_path, index=False)
+    print(f"Exported '{path}' to '{csv_path}'")
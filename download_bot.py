@@ -1,31 +1,25 @@
-import os
-import webbrowser
-import time
+import sys
+from bulk_downloader import download_all, read_links, DOWNLOAD_DIR
 
 # Path to your TXT file containing the links
 txt_file = "matching_links.txt"
 
-# Read links from txt file
-with open(txt_file, "r") as f:
-    links = [line.strip() for line in f if line.strip()]
+# Files are fetched concurrently with resume and retries (see bulk_downloader.py);
+# completed ones are recorded in the download manifest and skipped on reruns
+download_dir = DOWNLOAD_DIR
 
-batch_size = 3
-wait_time = 10  # seconds
+if __name__ == "__main__":
+    # Usage: python download_bot.py [links.txt] [download_dir]
+    if len(sys.argv) > 1:
+        txt_file = sys.argv[1]
+    if len(sys.argv) > 2:
+        download_dir = sys.argv[2]
 
-print(f"Opening {len(links)} links in your default browser in batches of {batch_size}...")
+    links = read_links(txt_file)
+    print(f"Downloading {len(links)} links from '{txt_file}' to '{download_dir}'...")
+    downloaded, skipped, failed = download_all(links, download_dir)
 
-for i in range(0, len(links), batch_size):
-    batch = links[i:i+batch_size]
-    print(f"\nOpening batch {i//batch_size + 1} ({len(batch)} links)...")
-    
-    for url in batch:
-        try:
-            webbrowser.open(url)  # opens in default browser
-            print(f"🌐 Opened: {url}")
-        except Exception as e:
-            print(f"❌ Failed: {url} | Error: {e}")
-    
-    print(f"⏳ Waiting {wait_time} seconds before next batch...")
-    time.sleep(wait_time)
-
-print("\n🎉 All links processed.")
+    if failed:
+        print(f"\n❌ {len(failed)} link(s) failed; rerun to retry them.")
+    else:
+        print("\n🎉 All links processed.")
@@ -0,0 +1,160 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+ARTIFACT_VERSION = 1
+
+# Node arrays stored by export_forest(), one .npy file each
+NODE_ARRAYS = ['feature', 'threshold', 'children_left', 'children_right', 'missing_go_to_left', 'value']
+
+
+# --- SCRIPT ---
+
+def forest_arrays(model, feature_names=None):
+    """
+    Flattens a fitted RandomForestClassifier into one node table: the tree_
+    arrays of all trees concatenated, child indices made global and leaf
+    values normalised to class probabilities. Returns (arrays, meta), where
+    arrays also holds 'roots', the first node of each tree.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    offsets = np.cumsum([0] + [t.node_count for t in trees])
+
+    arrays = {name: [] for name in NODE_ARRAYS}
+    for tree, offset in zip(trees, offsets):
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        arrays['feature'].append(tree.feature.astype(np.int32))
+        arrays['threshold'].append(tree.threshold.astype(np.float64))
+        arrays['children_left'].append(np.where(left >= 0, left + offset, -1))
+        arrays['children_right'].append(np.where(right >= 0, right + offset, -1))
+        mgl = getattr(tree, 'missing_go_to_left', None)
+        arrays['missing_go_to_left'].append(
+            np.zeros(tree.node_count, np.uint8) if mgl is None else np.asarray(mgl, np.uint8))
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        arrays['value'].append(value / normalizer)
+
+    arrays = {name: np.ascontiguousarray(np.concatenate(parts)) for name, parts in arrays.items()}
+    arrays['roots'] = offsets[:-1].astype(np.int64)
+
+    if feature_names is None and hasattr(model, 'feature_names_in_'):
+        feature_names = list(model.feature_names_in_)
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'n_trees': len(trees),
+        'n_nodes': int(offsets[-1]),
+        'max_depth': int(max(t.max_depth for t in trees)),
+        'n_features': int(model.n_features_in_),
+        'feature_names': feature_names,
+        'classes': np.asarray(model.classes_).tolist(),
+    }
+    return arrays, meta
+
+
+def export_forest(model, artifact_dir, feature_names=None):
+    """
+    Writes a fitted RandomForestClassifier as flat NumPy buffers (see
+    forest_arrays), one .npy file per node array, plus meta.json.
+    """
+    arrays, meta = forest_arrays(model, feature_names)
+    os.makedirs(artifact_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(artifact_dir, f'{name}.npy'), array)
+    with open(os.path.join(artifact_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+    print(f"Exported {meta['n_trees']} trees ({meta['n_nodes']} nodes) to '{artifact_dir}'")
+
+
+class ForestArtifact:
+    """
+    A forest loaded from export_forest() buffers. With mmap=True the node
+    arrays are memory-mapped, so loading is near-instant and processes that
+    load the same artifact share one page-cached copy.
+    """
+
+    def __init__(self, artifact_dir, mmap=True):
+        with open(os.path.join(artifact_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported forest artifact version in '{artifact_dir}'")
+
+        mode = 'r' if mmap else None
+        for name in NODE_ARRAYS + ['roots']:
+            setattr(self, name, np.load(os.path.join(artifact_dir, f'{name}.npy'), mmap_mode=mode))
+        self.classes_ = np.asarray(self.meta['classes'])
+        self.feature_names = self.meta['feature_names']
+        self.n_features_in_ = self.meta['n_features']
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame) and self.feature_names:
+            X = X[self.feature_names]
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        return X
+
+    def apply_tree(self, root, X):
+        """
+        Returns the leaf node (global index) reached by every row of float32 X in one tree.
+        """
+        rows = np.arange(len(X))
+        node = np.full(len(X), root, dtype=np.int64)
+        active = rows
+        while len(active):
+            current = node[active]
+            feature = self.feature[current]
+            is_leaf = self.children_left[current] < 0
+            active, current, feature = active[~is_leaf], current[~is_leaf], feature[~is_leaf]
+            x = X[active, feature]
+            go_left = np.where(np.isnan(x), self.missing_go_to_left[current].astype(bool),
+                               x <= self.threshold[current])
+            node[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+        return node
+
+    def predict_proba(self, X):
+        """
+        Class probabilities averaged over the trees, as RandomForestClassifier.predict_proba.
+        """
+        X = self._as_array(X)
+        proba = np.zeros((len(X), len(self.classes_)))
+        for root in self.roots:
+            proba += self.value[self.apply_tree(root, X)]
+        return proba / len(self.roots)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_forest(artifact_dir, mmap=True):
+    return ForestArtifact(artifact_dir, mmap=mmap)
+
+
+def load_model(path):
+    """
+    Loads a model from a forest artifact directory or a joblib/pickle file.
+    """
+    if os.path.isdir(path):
+        return load_forest(path)
+    import joblib
+    return joblib.load(path)
+
+
+def validate_forest(model, artifact, X, atol=1e-9):
+    """
+    Checks that the artifact reproduces the sklearn model on X: the same
+    predicted classes and probabilities within atol. Returns True if so.
+    """
+    expected = model.predict_proba(X)
+    actual = artifact.predict_proba(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+    same_classes = np.array_equal(model.predict(X), artifact.predict(X))
+    ok = same_classes and max_diff <= atol
+    print(f"Forest artifact validation on {len(X)} rows: max |p_sklearn - p_artifact| = {max_diff:.3g}, "
+          f"classes {'match' if same_classes else 'DIFFER'} -> {'OK' if ok else 'FAILED'}")
+    return ok
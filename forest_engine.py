@@ -0,0 +1,274 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from forest_artifact import forest_arrays, load_forest
+
+try:
+    from numba import njit
+except Exception:  # not installed, or failing to import (e.g. a shadowed dependency)
+    njit = None
+HAS_NUMBA = njit is not None
+
+# --- CONFIGURATION ---
+MODEL_FILE = r"D:\NASA_hackathon_2025\shark_rf_model.joblib"
+
+# Rows evaluated together against every tree; bounds the working set to
+# roughly CHUNK_ROWS * n_trees * 16 bytes per thread
+CHUNK_ROWS = 4096
+N_THREADS = os.cpu_count() or 1
+
+# Rows walked down a tree together by the numba kernel (see _predict_chunk_compiled)
+LANES = 16
+
+# Benchmark size (rows drawn uniformly inside the model's split ranges)
+BENCH_ROWS = 1_000_000
+
+
+# --- SCRIPT ---
+
+def _predict_chunk_numpy(X, feature, threshold, left, right, missing_go_to_left, value, roots, out):
+    """
+    Walks every tree for a chunk of rows in lock-step NumPy passes. Each pass
+    advances all (tree, row) pairs that have not reached a leaf yet by one
+    level; finished pairs are dropped, so the total work is the sum of the
+    path lengths.
+    """
+    n_rows, n_features = X.shape
+    flat_X = X.ravel()
+    has_nan = np.isnan(flat_X).any()
+
+    nodes = np.repeat(roots, n_rows)
+    current = nodes.copy()
+    offsets = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, len(roots))
+    active = np.arange(len(nodes))
+    while len(active):
+        x = flat_X[offsets + feature[current]]
+        go_left = x <= threshold[current]
+        if has_nan:
+            go_left |= np.isnan(x) & missing_go_to_left[current]
+        following = np.where(go_left, left[current], right[current])
+        nodes[active] = following
+        moving = following != current  # leaves point to themselves
+        active, current, offsets = active[moving], following[moving], offsets[moving]
+
+    # Accumulate tree by tree, in the same order as sklearn
+    proba = np.zeros(out.shape)
+    for tree_nodes in nodes.reshape(len(roots), n_rows):
+        proba += value[tree_nodes]
+    out[:] = proba / len(roots)
+
+
+def _predict_chunk_compiled(X, node, threshold, value, roots, out):
+    """
+    Same computation as _predict_chunk_numpy as a compiled loop, one tree at
+    a time over all rows of the chunk, so the tree's nodes stay in cache.
+    The rows are walked down the tree in LANES interleaved traversals; a
+    lane that reaches a leaf takes the next row, so the independent node
+    loads overlap and no lane idles until the slowest path finishes.
+
+    node packs each node's left child (bits 32+, the right child follows
+    it), its missing-goes-left flag (bit 31) and its feature (bits 0-30).
+    """
+    n_rows, n_classes = out.shape
+    has_nan = np.isnan(X).any()
+    proba = np.zeros((n_rows, n_classes))
+    lanes = LANES
+    lane_node = np.empty(lanes, np.int64)
+    lane_row = np.empty(lanes, np.int64)
+    for t in range(len(roots)):
+        root = np.int64(roots[t])
+        next_row = 0
+        active = 0
+        for k in range(lanes):
+            lane_node[k] = root
+            lane_row[k] = -1
+            if next_row < n_rows:
+                lane_row[k] = next_row
+                next_row += 1
+                active += 1
+        while active:
+            for k in range(lanes):
+                i = lane_row[k]
+                if i < 0:
+                    continue
+                current = lane_node[k]
+                packed = node[current]
+                x = X[i, packed & 0x7FFFFFFF]
+                go_left = x <= threshold[current]
+                if has_nan and not go_left:
+                    go_left = (packed >> 31) & 1 == 1 and np.isnan(x)
+                following = (packed >> 32) + 1 - np.int64(go_left)
+                if following != current:
+                    lane_node[k] = following
+                    continue
+                # Leaf (leaves point to themselves): add it and start the next row
+                for c in range(n_classes):
+                    proba[i, c] += value[current, c]
+                lane_node[k] = root
+                if next_row < n_rows:
+                    lane_row[k] = next_row
+                    next_row += 1
+                else:
+                    lane_row[k] = -1
+                    active -= 1
+    for i in range(n_rows):
+        for c in range(n_classes):
+            out[i, c] = proba[i, c] / len(roots)
+
+
+# numba is optional: compile the loop when it is installed, otherwise use NumPy
+if HAS_NUMBA:
+    _predict_chunk_compiled = njit(nogil=True, cache=True)(_predict_chunk_compiled)
+
+
+class ForestEngine:
+    """
+    Vectorized inference for a flattened random forest.
+
+    Nodes are stored as a compact struct-of-arrays: int16 feature, float32
+    threshold, int32 children and float64 leaf probabilities, with leaves
+    pointing to themselves. Nodes are renumbered so that every right child
+    directly follows its left child, and the numba kernel reads a node's
+    child, feature and missing-value flag from one packed int64. Rows are
+    scored in chunks of chunk_rows spread over a thread pool, so memory
+    stays bounded whatever the input size. Each chunk runs through a
+    numba-compiled loop when numba is installed, and through vectorized
+    NumPy passes otherwise (several times slower than sklearn).
+
+    Results match RandomForestClassifier.predict_proba exactly: inputs are
+    compared as float32 like sklearn does, and thresholds are rounded down to
+    float32, which keeps every x <= threshold decision unchanged for float32 x.
+    """
+
+    def __init__(self, arrays, meta, chunk_rows=CHUNK_ROWS, n_threads=N_THREADS):
+        left = np.asarray(arrays['children_left'])
+        right = np.asarray(arrays['children_right'])
+        roots = np.asarray(arrays['roots'])
+        is_leaf = left < 0
+
+        # New ids: the roots first, then the children of each internal node as an adjacent pair
+        internal = np.flatnonzero(~is_leaf)
+        new_id = np.empty(len(left), dtype=np.int64)
+        new_id[roots] = np.arange(len(roots))
+        new_id[left[internal]] = len(roots) + 2 * np.arange(len(internal))
+        new_id[right[internal]] = len(roots) + 2 * np.arange(len(internal)) + 1
+        order = np.empty_like(new_id)
+        order[new_id] = np.arange(len(left))
+        is_leaf = is_leaf[order]
+        node_ids = np.arange(len(left))
+
+        threshold = np.asarray(arrays['threshold'], dtype=np.float64)[order]
+        threshold32 = threshold.astype(np.float32)
+        too_high = threshold32.astype(np.float64) > threshold
+        threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+        threshold32[is_leaf] = np.inf
+
+        self.feature = np.where(is_leaf, 0, np.asarray(arrays['feature'])[order]).astype(np.int16)
+        self.threshold = threshold32
+        self.left = np.where(is_leaf, node_ids, new_id[left[order]]).astype(np.int32)
+        self.right = np.where(is_leaf, node_ids, new_id[right[order]]).astype(np.int32)
+        self.missing_go_to_left = np.asarray(arrays['missing_go_to_left'])[order].astype(bool) & ~is_leaf
+        self.value = np.ascontiguousarray(np.asarray(arrays['value'])[order], dtype=np.float64)
+        self.roots = new_id[roots].astype(np.int32)
+        # Leaves keep NaN inputs on themselves too
+        self.node = ((self.left.astype(np.int64) << 32) | ((self.missing_go_to_left | is_leaf).astype(np.int64) << 31) |
+                     self.feature.astype(np.int64))
+
+        self.max_depth = meta['max_depth']
+        self.classes_ = np.asarray(meta['classes'])
+        self.feature_names = meta['feature_names']
+        self.n_features_in_ = meta['n_features']
+        self.chunk_rows = chunk_rows
+        self.n_threads = n_threads
+
+    @classmethod
+    def from_model(cls, model, feature_names=None, **kwargs):
+        arrays, meta = forest_arrays(model, feature_names)
+        return cls(arrays, meta, **kwargs)
+
+    @classmethod
+    def from_artifact(cls, artifact_dir, **kwargs):
+        artifact = load_forest(artifact_dir)
+        arrays = {name: getattr(artifact, name) for name in
+                  ['feature', 'threshold', 'children_left', 'children_right', 'missing_go_to_left', 'value', 'roots']}
+        return cls(arrays, artifact.meta, **kwargs)
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame) and self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        return X
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(self._as_array(X))
+        out = np.empty((len(X), len(self.classes_)))
+        starts = range(0, len(X), self.chunk_rows)
+
+        def run(start):
+            stop = min(start + self.chunk_rows, len(X))
+            if HAS_NUMBA:
+                _predict_chunk_compiled(X[start:stop], self.node, self.threshold, self.value, self.roots,
+                                        out[start:stop])
+            else:
+                _predict_chunk_numpy(X[start:stop], self.feature, self.threshold, self.left, self.right,
+                                     self.missing_go_to_left, self.value, self.roots, out[start:stop])
+
+        if self.n_threads <= 1 or len(X) <= self.chunk_rows:
+            for start in starts:
+                run(start)
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+                list(executor.map(run, starts))
+        return out
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def benchmark(model, X, engine=None):
+    """
+    Times model.predict_proba against ForestEngine on the same rows and
+    checks that the probabilities agree.
+    """
+    engine = engine or ForestEngine.from_model(model)
+    X = pd.DataFrame(X, columns=engine.feature_names) if engine.feature_names else X
+
+    start = time.perf_counter()
+    expected = model.predict_proba(X)
+    sklearn_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = engine.predict_proba(X)
+    engine_time = time.perf_counter() - start
+
+    max_diff = float(np.max(np.abs(expected - actual)))
+    print(f"Rows scored      : {len(X)}")
+    print(f"sklearn          : {sklearn_time:.3f} s ({len(X) / sklearn_time:,.0f} rows/s)")
+    print(f"ForestEngine     : {engine_time:.3f} s ({len(X) / engine_time:,.0f} rows/s, "
+          f"{engine.n_threads} threads, chunks of {engine.chunk_rows}, "
+          f"{'numba' if HAS_NUMBA else 'NumPy'} kernel)")
+    print(f"Speed-up         : {sklearn_time / engine_time:.1f}x")
+    print(f"Max |difference| : {max_diff:.3g}")
+    return sklearn_time, engine_time, max_diff
+
+
+if __name__ == "__main__":
+    import joblib
+
+    model = joblib.load(MODEL_FILE)
+    engine = ForestEngine.from_model(model)
+
+    # Synthetic rows spanning the range of every feature's split thresholds
+    rng = np.random.default_rng(42)
+    splits = engine.threshold[np.isfinite(engine.threshold)]
+    split_features = engine.feature[np.isfinite(engine.threshold)]
+    lows = [splits[split_features == f].min() if (split_features == f).any() else 0.0 for f in range(engine.n_features_in_)]
+    highs = [splits[split_features == f].max() if (split_features == f).any() else 1.0 for f in range(engine.n_features_in_)]
+    X = rng.uniform(lows, highs, size=(BENCH_ROWS, engine.n_features_in_))
+
+    benchmark(model, X, engine)
@@ -1,10 +1,29 @@
 import datetime
+import glob
+import os
+
+from swot_links import filter_swot_links, load_pass_footprints, study_area_passes
 
 # Paths to your files
 links_file_path = r"D:\NASA_hackathon_2025\link.txt"      # file with URLs
 dates_file_path = r"D:\NASA_hackathon_2025\missing_dates.txt"     # file with dates to match
+swot_links_file_path = r"D:\NASA_hackathon_2025\0036416425-download.txt"  # PO.DAAC SWOT download list
 output_file_path = r"matching_links.txt"  # output file
 
+# SWOT granules to keep (None = do not filter on that field)
+swot_variants = ['Expert']  # one variant with ssha_karin is enough; WindWave has no SSH
+swot_cycles = None          # e.g. {1, 2, 3}
+swot_passes = None          # e.g. {4, 17, 282}
+swot_start = None           # e.g. "2024-01-01" (granules overlapping start..end are kept)
+swot_end = None             # e.g. "2024-12-31" (the whole day) or "2024-12-31T12:00:00"
+
+# Study area (min_lat, max_lat, min_lon, max_lon), or None. Passes whose swath
+# misses it are dropped; swaths are read from local granules in swot_dir (the
+# ground tracks repeat every cycle), so passes with no local granule are kept.
+study_bbox = None
+swot_dir = r"D:\NASA_hackathon_2025\SSH"
+pass_footprints_file = r"D:\NASA_hackathon_2025\swot_pass_footprints.json"
+
 # Read dates and convert them to YYYYMMDD format for comparison
 dates_to_match = set()
 with open(dates_file_path, 'r') as f:
@@ -37,6 +56,28 @@ with open(links_file_path, 'r') as f:
         except IndexError:
             continue  # skip malformed lines
 
+# SWOT links: filter by variant, cycle/pass, time window and study area
+if os.path.exists(swot_links_file_path):
+    with open(swot_links_file_path, 'r') as f:
+        swot_links = [line.strip() for line in f if line.strip()]
+
+    outside_passes = None
+    if study_bbox is not None:
+        footprints = load_pass_footprints(glob.glob(os.path.join(swot_dir, '*.nc')), pass_footprints_file)
+        if footprints:
+            outside_passes = set(footprints) - study_area_passes(footprints, study_bbox)
+            print(f"{len(footprints) - len(outside_passes)} of {len(footprints)} known passes cross the study area")
+        else:
+            print("Warning: no local SWOT granules to locate the passes; study area filter skipped")
+
+    kept, reasons = filter_swot_links(swot_links, swot_variants, swot_cycles, swot_passes,
+                                      swot_start, swot_end, outside_passes)
+    print(f"SWOT: kept {len(kept)} of {len(swot_links)} links")
+    for reason, count in reasons.items():
+        if count:
+            print(f"  dropped {count} ({reason})")
+    matching_links.extend(kept)
+
 # Write matching links to output file
 with open(output_file_path, 'w') as f:
     for link in matching_links:
@@ -0,0 +1,193 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from netCDF4 import Dataset
+from tqdm import tqdm
+
+from build_ml_dataset_optimized import (CATALOG_DIRS, CATALOG_FILE, SWOT_CACHE_DIR, SSHA_METHOD, REGRID_CACHE_DIR,
+                                        MODIS_VARS, find_day_files, open_modis_dataset, nearest_grid_index,
+                                        store_granules)
+from catalog import load_catalog
+from swot_cache import load_swot_day
+from swot_regrid import regrid_swot_day, lookup_grid_values
+from forest_engine import ForestEngine, HAS_NUMBA
+
+# --- 1. CONFIGURATION: UPDATE THESE PATHS ---
+BASE_DIR = r"D:\NASA_hackathon_2025"
+
+# Trained model: the forest artifact directory from tain.py, or the .joblib
+# file when there is no artifact (or numba is not installed)
+MODEL_FILE = os.path.join(BASE_DIR, 'shark_rf_model.forest')
+FALLBACK_MODEL_FILE = os.path.join(BASE_DIR, 'shark_rf_model.joblib')
+
+# Daily maps are written here as habitat_YYYYMMDD.nc
+OUTPUT_DIR = os.path.join(BASE_DIR, 'habitat_maps')
+
+# Features in model order (must match training)
+FEATURES = ['chlor_a', 'carbon_phyto', 'sst', 'ssha_karin']
+
+# Region to map as (min_lat, max_lat, min_lon, max_lon); None maps the whole grid
+REGION = None
+
+# The grid is scored in bands of this many rows, so memory does not depend
+# on the grid size; the output NetCDF is chunked the same way
+TILE_ROWS = 256
+OUTPUT_CHUNK_COLS = 1024
+
+THRESHOLD = 0.5
+
+
+# --- 2. SCRIPT ---
+
+def load_engine(model_file=MODEL_FILE, fallback_file=FALLBACK_MODEL_FILE):
+    """
+    Builds a ForestEngine from a forest artifact directory or a joblib model,
+    loading fallback_file if model_file does not exist. Without numba the
+    engine's NumPy fallback is slower than sklearn, so the joblib model is
+    then preferred and used as is.
+    """
+    if os.path.isdir(model_file):
+        if HAS_NUMBA or not os.path.exists(fallback_file):
+            if not HAS_NUMBA:
+                print("Warning: numba is not installed; scoring the forest artifact with the NumPy fallback.")
+            return ForestEngine.from_artifact(model_file)
+        model_file = fallback_file
+    elif not os.path.exists(model_file):
+        print(f"Warning: '{model_file}' not found; loading '{fallback_file}' instead.")
+        model_file = fallback_file
+    import joblib
+    model = joblib.load(model_file)
+    if not HAS_NUMBA:
+        return model
+    return ForestEngine.from_model(model, feature_names=FEATURES)
+
+
+def region_slices(lat, lon, region):
+    """
+    Row and column slices of the grid covering region (whole grid if None).
+    """
+    if region is None:
+        return slice(0, len(lat)), slice(0, len(lon))
+    min_lat, max_lat, min_lon, max_lon = region
+    rows = np.sort(nearest_grid_index(lat, [min_lat, max_lat]))
+    cols = np.sort(nearest_grid_index(lon, [min_lon, max_lon]))
+    return slice(rows[0], rows[1] + 1), slice(cols[0], cols[1] + 1)
+
+
+def ssha_lookup(date_str, swot_files):
+    """
+    Returns a function mapping (lat, lon) arrays to ssha_karin, using the same
+    SSHA_METHOD as the training-dataset builder, or None if the day has no
+    SWOT data.
+    """
+    if SSHA_METHOD == 'regrid':
+        cells, values = regrid_swot_day(swot_files, REGRID_CACHE_DIR, store_granules(date_str, swot_files))
+        if len(cells) == 0:
+            return None
+        return lambda lats, lons: lookup_grid_values(cells, values, lats, lons)
+
+    points, tree = load_swot_day(date_str, swot_files, SWOT_CACHE_DIR,
+                                 store_granules(date_str, swot_files)) if swot_files else (None, None)
+    if tree is None:
+        return None
+
+    def lookup(lats, lons):
+        _, indices = tree.query(np.column_stack([lats, lons]), k=1)
+        return points[indices, 2]
+    return lookup
+
+
+def generate_habitat_map(date, engine=None, region=REGION, output_dir=OUTPUT_DIR, catalog=None):
+    """
+    Scores every ocean cell of the MODIS 4km grid for one date and streams the
+    habitat probability to output_dir/habitat_YYYYMMDD.nc, one band of
+    TILE_ROWS rows at a time. Cells missing any feature are left as NaN.
+    The map is written to a temporary file and renamed when complete.
+    Returns the output path, or None if the date lacks MODIS or SWOT data.
+    """
+    date = pd.Timestamp(date).date()
+    date_str = date.strftime('%Y%m%d')
+    engine = engine or load_engine()
+    catalog = catalog or load_catalog(CATALOG_DIRS, CATALOG_FILE)
+    day_files = find_day_files(catalog, date)
+
+    missing = [var for var in MODIS_VARS if var not in day_files]
+    if missing:
+        print(f"Skipping {date}: no MODIS file for {missing}.")
+        return None
+    lookup = ssha_lookup(date_str, day_files['ssh'])
+    if lookup is None:
+        print(f"Skipping {date}: no SWOT ssha_karin data.")
+        return None
+
+    datasets = {var: open_modis_dataset(day_files[var]) for var in MODIS_VARS}
+    tmp_file = None
+    try:
+        lat = datasets[MODIS_VARS[0]]['lat'].values
+        lon = datasets[MODIS_VARS[0]]['lon'].values
+        rows, cols = region_slices(lat, lon, region)
+        lat, lon = lat[rows], lon[cols]
+
+        os.makedirs(output_dir, exist_ok=True)
+        output_file = os.path.join(output_dir, f'habitat_{date_str}.nc')
+        fd, tmp_file = tempfile.mkstemp(dir=output_dir, prefix=f'habitat_{date_str}_', suffix='.tmp')
+        os.close(fd)
+        with Dataset(tmp_file, 'w') as nc:
+            nc.title = 'Shark habitat suitability'
+            nc.date = date.isoformat()
+            nc.model = os.path.basename(MODEL_FILE)
+            nc.features = ', '.join(FEATURES)
+            nc.threshold = THRESHOLD
+            nc.created = datetime.now().isoformat(timespec='seconds')
+            nc.createDimension('lat', len(lat))
+            nc.createDimension('lon', len(lon))
+            nc.createVariable('lat', 'f4', ('lat',))[:] = lat
+            nc.createVariable('lon', 'f4', ('lon',))[:] = lon
+            prob = nc.createVariable('habitat_probability', 'f4', ('lat', 'lon'), zlib=True, complevel=4,
+                                     fill_value=np.float32(np.nan),
+                                     chunksizes=(min(TILE_ROWS, len(lat)), min(OUTPUT_CHUNK_COLS, len(lon))))
+            prob.long_name = 'Probability of shark presence'
+            prob.units = '1'
+
+            n_scored = 0
+            for r0 in tqdm(range(0, len(lat), TILE_ROWS), desc=f"Scoring {date}"):
+                r1 = min(r0 + TILE_ROWS, len(lat))
+                band_rows = slice(rows.start + r0, rows.start + r1)
+                band = {var: datasets[var][var].isel(lat=band_rows, lon=cols).values.ravel()
+                        for var in MODIS_VARS}
+
+                ocean = np.logical_and.reduce([np.isfinite(band[var]) for var in MODIS_VARS])
+                values = np.full(ocean.shape, np.nan, dtype=np.float32)
+                if ocean.any():
+                    lat_grid, lon_grid = np.meshgrid(lat[r0:r1], lon, indexing='ij')
+                    band['ssha_karin'] = np.full(ocean.shape, np.nan)
+                    band['ssha_karin'][ocean] = lookup(lat_grid.ravel()[ocean], lon_grid.ravel()[ocean])
+
+                    # Only cells with every feature are scored, as in training
+                    complete = ocean & np.isfinite(band['ssha_karin'])
+                    if complete.any():
+                        X = pd.DataFrame({f: band[f][complete] for f in FEATURES})
+                        values[complete] = engine.predict_proba(X)[:, 1]
+                        n_scored += int(complete.sum())
+                prob[r0:r1, :] = values.reshape(r1 - r0, len(lon))
+        os.replace(tmp_file, output_file)
+        tmp_file = None
+    finally:
+        for ds in datasets.values():
+            ds.close()
+        if tmp_file is not None and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    print(f"Scored {n_scored} ocean cells with every feature for {date}; map written to '{output_file}'")
+    return output_file
+
+
+if __name__ == "__main__":
+    # Usage: python habitat_map.py YYYY-MM-DD [YYYY-MM-DD ...]
+    engine = load_engine()
+    catalog = load_catalog(CATALOG_DIRS, CATALOG_FILE)
+    for day in sys.argv[1:]:
+        generate_habitat_map(day, engine=engine, catalog=catalog)
@@ -0,0 +1,233 @@
+import os
+import json
+import math
+import hashlib
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import roc_curve, precision_recall_curve
+
+from dataset_io import read_training_dataset
+from cv_runner import evaluate_models, default_forest, N_JOBS
+
+# --- CONFIGURATION ---
+# Parquet dataset written by the builder (a .csv export also works)
+TRAINING_DATA_FILE = r"D:\NASA_hackathon_2025\training_dataset"
+
+FEATURES = ["chlor_a", "carbon_phyto", "sst", "ssha_karin"]
+TARGET = "presence"
+
+# Every combination is a candidate configuration of the RandomForest
+SEARCH_SPACE = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [None, 12, 24],
+    'max_features': ['sqrt', 0.75, None],
+}
+
+# Successive halving: each rung keeps the best 1/ETA of the configurations
+# and evaluates them on ETA times more rows, ending on the full dataset
+ETA = 3
+N_FOLDS = 3
+RANDOM_STATE = 42
+
+# Threshold chosen on the out-of-fold probabilities of the best configuration:
+# 'f1' maximises the F1 score of the presence class, 'youden' maximises TPR - FPR
+THRESHOLD_METRIC = 'f1'
+
+# Evaluated configurations per dataset fingerprint; reruns skip them
+CACHE_FILE = r"D:\NASA_hackathon_2025\hyperparameter_cache.json"
+
+# Best configuration and threshold, read by tain.py and tune.py
+TUNED_PARAMS_FILE = r"D:\NASA_hackathon_2025\shark_rf_tuned.json"
+
+
+# --- SCRIPT ---
+
+def dataset_fingerprint(X, y):
+    """
+    Content hash of the feature table and labels.
+    """
+    h = hashlib.sha1(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(np.asarray(y).tobytes())
+    return h.hexdigest()
+
+
+def candidate_configs(space=None):
+    space = space or SEARCH_SPACE
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def config_key(params, n_rows):
+    return json.dumps({'params': params, 'n_rows': n_rows, 'folds': N_FOLDS, 'seed': RANDOM_STATE}, sort_keys=True)
+
+
+def load_cache(cache_file=CACHE_FILE):
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable search cache '{cache_file}': {e}")
+    return {}
+
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmp_file, cache_file)
+
+
+def rung_sizes(n_configs, n_rows, eta=ETA):
+    """
+    Row budgets of the successive-halving rungs, ending at n_rows.
+    """
+    n_rungs = max(1, math.ceil(math.log(n_configs, eta))) if n_configs > 1 else 1
+    return [min(n_rows, max(N_FOLDS * 10, int(n_rows / eta ** (n_rungs - 1 - r)))) for r in range(n_rungs)]
+
+
+def choose_threshold(y, proba, metric=THRESHOLD_METRIC):
+    """
+    Probability threshold that maximises metric ('f1' or 'youden') on (y, proba).
+    """
+    if metric == 'youden':
+        fpr, tpr, thresholds = roc_curve(y, proba)
+        return float(np.clip(thresholds[np.argmax(tpr - fpr)], 0.0, 1.0))
+    precision, recall, thresholds = precision_recall_curve(y, proba)
+    f1 = 2 * precision[:-1] * recall[:-1] / np.maximum(precision[:-1] + recall[:-1], 1e-12)
+    return float(thresholds[np.argmax(f1)])
+
+
+def successive_halving(X, y, configs=None, n_jobs=N_JOBS, cache_file=CACHE_FILE):
+    """
+    Successive-halving search over configs (all of SEARCH_SPACE by default).
+    Each rung cross-validates the surviving configurations on a nested
+    random subsample, all (configuration, fold) fits of a rung in one
+    process pool, and keeps the best 1/ETA by mean AUC. Scores are cached
+    per dataset fingerprint, so only new configurations are fitted.
+
+    Returns (best_params, threshold, history), where history lists one row
+    per evaluation and threshold is chosen on the best configuration's
+    out-of-fold probabilities on the full dataset (cached with its score).
+    """
+    configs = configs or candidate_configs()
+    y = np.asarray(y)
+    fingerprint = dataset_fingerprint(X, y)
+    cache = load_cache(cache_file)
+    scores = cache.setdefault(fingerprint, {})
+
+    # Nested subsamples: every rung's rows include the previous rung's
+    order = np.random.default_rng(RANDOM_STATE).permutation(len(y))
+    sizes = rung_sizes(len(configs), len(y))
+    print(f"Searching {len(configs)} configurations over rungs of {sizes} rows (eta={ETA}, {N_FOLDS} folds)")
+
+    history = []
+    survivors = list(range(len(configs)))
+    for rung, n_rows in enumerate(sizes):
+        rows = np.sort(order[:n_rows])
+        X_rung, y_rung = X.iloc[rows], y[rows]
+        splits = list(StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=RANDOM_STATE).split(X_rung, y_rung))
+        keys = {i: config_key(configs[i], n_rows) for i in survivors}
+
+        start = time.perf_counter()
+        todo = [i for i in survivors if keys[i] not in scores]
+        _evaluate(configs, todo, keys, scores, X_rung, y_rung, splits, n_jobs)
+        if todo:
+            save_cache(cache, cache_file)
+
+        ranked = sorted(survivors, key=lambda i: scores[keys[i]]['auc'], reverse=True)
+        for i in ranked:
+            history.append({'rung': rung, 'n_rows': n_rows, **configs[i], 'auc': scores[keys[i]]['auc'],
+                            'cached': i not in todo})
+        print(f"Rung {rung}: {len(survivors)} configuration(s) on {n_rows} rows, "
+              f"{len(todo)} fitted in {time.perf_counter() - start:.1f} s, "
+              f"best AUC {scores[keys[ranked[0]]]['auc']:.4f}")
+        survivors = ranked[:max(1, len(ranked) // ETA)]
+
+    # The last rung covers all rows; caches written before thresholds were
+    # stored need the winner refitted once
+    best = ranked[0]
+    if THRESHOLD_METRIC not in scores[keys[best]].get('thresholds', {}):
+        _evaluate(configs, [best], keys, scores, X_rung, y_rung, splits, n_jobs)
+        save_cache(cache, cache_file)
+    return configs[best], scores[keys[best]]['thresholds'][THRESHOLD_METRIC], pd.DataFrame(history)
+
+
+def _evaluate(configs, todo, keys, scores, X, y, splits, n_jobs):
+    """
+    Cross-validates configs[i] for every i in todo and records their scores
+    and the thresholds chosen on their out-of-fold probabilities.
+    """
+    if not todo:
+        return
+    fold_results = evaluate_models([default_forest(**configs[i]) for i in todo], X, y, splits, n_jobs=n_jobs)
+    for i, results in zip(todo, fold_results):
+        oof = np.empty(len(y))
+        for r in results:
+            oof[r['test_idx']] = r['proba']
+        scores[keys[i]] = {
+            'auc': float(np.mean([r['auc'] for r in results])),
+            'seconds': float(sum(r['seconds'] for r in results)),
+            'thresholds': {m: choose_threshold(y, oof, m) for m in ('f1', 'youden')},
+        }
+
+
+def load_tuned(tuned_file=TUNED_PARAMS_FILE):
+    """
+    Returns the saved {'params': ..., 'threshold': ...} of the last search, or None.
+    """
+    if not os.path.exists(tuned_file):
+        return None
+    with open(tuned_file) as f:
+        return json.load(f)
+
+
+def save_model_info(model, X, y, info_file):
+    """
+    Records the searched parameters of a fitted model and the fingerprint of
+    the data it was fitted on, so tune.py can tell whether a tuned threshold
+    belongs to it.
+    """
+    params = model.get_params()
+    with open(info_file, 'w') as f:
+        json.dump({'params': {name: params[name] for name in SEARCH_SPACE},
+                   'dataset': dataset_fingerprint(X, np.asarray(y).astype(int))}, f, indent=1)
+
+
+def tuned_matches_model(tuned, info_file):
+    """
+    True if the model described by info_file (see save_model_info) was fitted
+    with the tuned parameters on the dataset the search ran on.
+    """
+    if not os.path.exists(info_file):
+        return False
+    with open(info_file) as f:
+        info = json.load(f)
+    return (info.get('dataset') == tuned.get('dataset')
+            and all(info['params'].get(name) == value for name, value in tuned['params'].items()))
+
+
+def run_search():
+    print(f"--- Loading training data from '{TRAINING_DATA_FILE}' ---")
+    df = read_training_dataset(TRAINING_DATA_FILE, columns=FEATURES + [TARGET])
+    df = df.dropna(subset=FEATURES + [TARGET]).reset_index(drop=True)
+    if df.empty:
+        print("No data left after cleaning. Exiting.")
+        return
+
+    best, threshold, history = successive_halving(df[FEATURES], df[TARGET].astype(int))
+    print("\n--- Search results (best first per rung) ---")
+    print(history.to_string(index=False))
+
+    with open(TUNED_PARAMS_FILE, 'w') as f:
+        json.dump({'params': best, 'threshold': threshold, 'threshold_metric': THRESHOLD_METRIC,
+                   'dataset': dataset_fingerprint(df[FEATURES], df[TARGET].astype(int))}, f, indent=1)
+    print(f"\nBest configuration: {best}, threshold {threshold:.3f} ({THRESHOLD_METRIC})")
+    print(f"Saved to '{TUNED_PARAMS_FILE}'")
+
+
+if __name__ == "__main__":
+    run_search()
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from netCDF4 import Dataset
+from tqdm import tqdm
+
+from catalog import CATALOG_DIRS, BASE_DIR, load_catalog, parse_filename
+from swot_cache import SSH_VAR_CANDIDATES, file_fingerprint
+
+# --- CONFIGURATION ---
+# Results of every check, keyed by file path and reused while the file's
+# fingerprint (name, size, mtime) is unchanged
+REPORT_FILE = os.path.join(BASE_DIR, 'integrity_report.json')
+REPORT_VERSION = 1
+
+# Variables are scanned in blocks of whole rows of about this many values,
+# so memory stays flat whatever the file size
+SCAN_BLOCK_VALUES = 4_000_000
+
+# Checksum of the file bytes (any hashlib name, e.g. 'md5' as listed by
+# PO.DAAC or 'sha1' as listed by OB.DAAC); None skips it. It is compared with
+# a sidecar file holding the published checksum (<file>.nc.md5) if present
+CHECKSUM_ALGORITHM = 'md5'
+CHECKSUM_BLOCK_BYTES = 8 * 1024 * 1024
+
+# The report is saved after this many new results, so an interrupted run keeps its progress
+SAVE_EVERY = 50
+
+N_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+
+# --- SCRIPT ---
+
+def expected_variables(path):
+    """
+    Data variables a file should hold, by its name: the product of a MODIS
+    file, the SSH candidates of a SWOT granule (the first present counts),
+    nothing for other files.
+    """
+    fields = parse_filename(path)
+    if fields is None:
+        return []
+    if fields['source'] == 'SWOT':
+        return SSH_VAR_CANDIDATES
+    return [fields['product']]
+
+
+def scan_variable(variable):
+    """
+    Returns (n_values, n_valid) of a netCDF4 variable, reading it in blocks
+    of rows aligned to its storage chunks. Fill values and NaNs are invalid.
+    """
+    shape = variable.shape
+    n_values = int(np.prod(shape))
+    if not shape or n_values == 0:
+        return n_values, int(np.ma.masked_invalid(variable[...]).count()) if n_values else 0
+
+    row_values = max(1, n_values // shape[0])
+    rows = max(1, SCAN_BLOCK_VALUES // row_values)
+    chunking = variable.chunking()
+    if isinstance(chunking, list):
+        rows = max(chunking[0], rows // chunking[0] * chunking[0])
+
+    n_valid = 0
+    for start in range(0, shape[0], rows):
+        n_valid += int(np.ma.masked_invalid(variable[start:start + rows]).count())
+    return n_values, n_valid
+
+
+def file_checksum(path, algorithm=CHECKSUM_ALGORITHM):
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_BLOCK_BYTES), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def published_checksum(path, algorithm=CHECKSUM_ALGORITHM):
+    """
+    Checksum listed in the sidecar file path.<algorithm> (as downloaded with
+    the data, 'hexdigest  filename'), or None if there is none.
+    """
+    sidecar = f"{path}.{algorithm}"
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar) as f:
+        words = f.read().split()
+    return words[0].lower() if words else None
+
+
+def check_file(path):
+    """
+    Checks one NetCDF file: whether it opens (header read), which expected
+    variable it holds, the valid count of that variable and the file
+    checksum. The checksum is compared with the published one when a sidecar
+    file exists (see published_checksum); otherwise it is only recorded, for
+    comparison with the archive listing later. Never raises; failures are
+    recorded in 'error'.
+    """
+    result = {'fingerprint': file_fingerprint(path), 'openable': False, 'variable': None,
+              'n_values': None, 'n_valid': None, 'checksum': None, 'error': None}
+    start = time.time()
+    try:
+        with Dataset(path) as ds:
+            result['openable'] = True
+            expected = expected_variables(path)
+            result['variable'] = next((var for var in expected if var in ds.variables), None)
+            if result['variable'] is not None:
+                result['n_values'], result['n_valid'] = scan_variable(ds.variables[result['variable']])
+            elif expected:
+                result['error'] = f"none of {expected} found"
+        if CHECKSUM_ALGORITHM:
+            checksum = file_checksum(path)
+            result['checksum'] = f"{CHECKSUM_ALGORITHM}:{checksum}"
+            published = published_checksum(path)
+            if published is not None and published != checksum and result['error'] is None:
+                result['error'] = f"{CHECKSUM_ALGORITHM} {checksum} does not match the published {published}"
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.time() - start, 3)
+    return result
+
+
+def load_report(report_file=REPORT_FILE):
+    if os.path.exists(report_file):
+        try:
+            with open(report_file) as f:
+                report = json.load(f)
+            if report.get('version') == REPORT_VERSION:
+                return report['files']
+        except Exception as e:
+            print(f"Warning: starting a new report, {report_file} is unreadable: {e}")
+    return {}
+
+
+def save_report(entries, report_file=REPORT_FILE):
+    report_dir = os.path.dirname(os.path.abspath(report_file))
+    os.makedirs(report_dir, exist_ok=True)
+    # A unique temp file, so two validation runs saving at once do not collide
+    fd, tmp_file = tempfile.mkstemp(dir=report_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': REPORT_VERSION, 'files': entries}, f, indent=1)
+        os.replace(tmp_file, report_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def validate_files(files, report_file=REPORT_FILE, n_workers=N_WORKERS):
+    """
+    Checks files with check_file() in a process pool (serially when
+    n_workers <= 1) and returns {path: result}. Files whose fingerprint
+    matches their entry in the report are not opened again; new results are
+    saved to the report.
+    """
+    entries = load_report(report_file)
+    keys = {path: os.path.abspath(path) for path in files}
+    todo = [path for path, key in keys.items()
+            if key not in entries or entries[key]['fingerprint'] != file_fingerprint(path)]
+    print(f"{len(keys)} file(s): {len(keys) - len(todo)} unchanged since the last check, {len(todo)} to check")
+
+    new_results = 0
+    if todo:
+        if n_workers is None or n_workers <= 1:
+            results = ((path, check_file(path)) for path in todo)
+            for path, result in tqdm(results, total=len(todo), desc="Checking files"):
+                entries[keys[path]] = result
+                new_results += 1
+                if new_results % SAVE_EVERY == 0:
+                    save_report(entries, report_file)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = {executor.submit(check_file, path): path for path in todo}
+                for future in tqdm(as_completed(futures), total=len(futures), desc=f"Checking files ({n_workers} workers)"):
+                    entries[keys[futures[future]]] = future.result()
+                    new_results += 1
+                    if new_results % SAVE_EVERY == 0:
+                        save_report(entries, report_file)
+        save_report(entries, report_file)
+
+    return {path: entries[key] for path, key in keys.items()}
+
+
+def print_summary(results):
+    bad = {path: r for path, r in results.items() if not r['openable'] or r['error']}
+    empty = [path for path, r in results.items() if r['openable'] and r['n_valid'] == 0]
+    print(f"\n{len(results)} file(s) checked: {len(bad)} with problems, {len(empty)} without any valid value")
+    for path, r in bad.items():
+        print(f"❌ {path}: {r['error']}")
+    for path in empty:
+        print(f"⚠️ {path}: no valid '{results[path]['variable']}' values")
+
+
+if __name__ == "__main__":
+    # Checks every MODIS and SWOT file of the catalog folders
+    catalog = load_catalog(CATALOG_DIRS)
+    all_files = [path for label in CATALOG_DIRS for path, _ in catalog.entries(label)]
+    print_summary(validate_files(all_files))
@@ -0,0 +1,174 @@
+import os
+import json
+import math
+import hashlib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from build_ml_dataset_optimized import (CATALOG_DIRS, CATALOG_FILE, BASE_DIR, find_day_files,
+                                        open_modis_dataset, nearest_grid_index)
+from habitat_map import OUTPUT_DIR as HABITAT_DIR
+from catalog import load_catalog
+from swot_cache import file_fingerprint, write_npz_cache
+from track_lod import MAP_PIXELS
+
+# --- CONFIGURATION ---
+# Overlays offered by the map: source variable, colour scale and value range
+# (None = the range of the grid); chlorophyll is shown as log10
+OVERLAY_LAYERS = {
+    'habitat_probability': {'label': 'Habitat probability', 'colorscale': 'Viridis', 'range': (0.0, 1.0), 'log': False},
+    'sst': {'label': 'SST (°C)', 'colorscale': 'RdBu_r', 'range': None, 'log': False},
+    'chlor_a': {'label': 'Chlorophyll-a (log10 mg m-3)', 'colorscale': 'Greens', 'range': None, 'log': True},
+}
+
+# Grids are block-averaged until they have at most this many cells, so an
+# overlay stays a small payload whatever the region size: each cell is one
+# scattergeo marker (5,000 cells are about 100 KB of JSON, encoded in under
+# 10 ms; 40,000 were 2.3 MB and 150 ms before the browser drew them)
+OVERLAY_MAX_CELLS = 5_000
+
+# Coordinates and values are sent rounded to this many decimals
+OVERLAY_DECIMALS = 3
+
+# Downsampled grids, one .npz per (layer, date, region, source file version)
+OVERLAY_CACHE_DIR = os.path.join(BASE_DIR, 'overlay_cache')
+MEMORY_CACHE_SIZE = 256
+
+
+# --- SCRIPT ---
+
+_catalog = None
+
+
+def _get_catalog():
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog(CATALOG_DIRS, CATALOG_FILE)
+    return _catalog
+
+
+def source_file(layer, date):
+    """
+    The daily NetCDF an overlay is drawn from, or None if it does not exist.
+    """
+    date = pd.Timestamp(date).date()
+    if layer == 'habitat_probability':
+        path = os.path.join(HABITAT_DIR, f"habitat_{date.strftime('%Y%m%d')}.nc")
+        return path if os.path.exists(path) else None
+    path = find_day_files(_get_catalog(), date).get(layer)
+    if path is None:
+        # The file may have been downloaded since the catalog was listed
+        path = find_day_files(_get_catalog().refresh(), date).get(layer)
+    return path
+
+
+def downsample(values, factor):
+    """
+    Block mean of a 2-D grid over factor x factor cells (NaNs ignored,
+    partial blocks at the edges trimmed).
+    """
+    ny, nx = (values.shape[0] // factor) * factor, (values.shape[1] // factor) * factor
+    blocks = values[:ny, :nx].reshape(ny // factor, factor, nx // factor, factor)
+    finite = np.isfinite(blocks)
+    counts = finite.sum(axis=(1, 3))
+    sums = np.where(finite, blocks, 0.0).sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def build_overlay(layer, path, region):
+    """
+    Reads the region (min_lat, max_lat, min_lon, max_lon) of layer from path
+    and returns (lon, lat, value) float32 arrays of the non-empty cells of the
+    downsampled grid.
+    """
+    ds = open_modis_dataset(path) if layer in CATALOG_DIRS else xr.open_dataset(path)
+    try:
+        lat, lon = ds['lat'].values, ds['lon'].values
+        min_lat, max_lat, min_lon, max_lon = region
+        rows = np.sort(nearest_grid_index(lat, [min_lat, max_lat]))
+        cols = np.sort(nearest_grid_index(lon, [min_lon, max_lon]))
+        rows, cols = slice(rows[0], rows[1] + 1), slice(cols[0], cols[1] + 1)
+        values = ds[layer].isel(lat=rows, lon=cols).values.astype(np.float64)
+        lat, lon = lat[rows], lon[cols]
+    finally:
+        ds.close()
+
+    factor = max(1, math.ceil(math.sqrt(values.size / OVERLAY_MAX_CELLS)))
+    grid = downsample(values, factor)
+    lat_c = lat[:grid.shape[0] * factor].reshape(-1, factor).mean(axis=1)
+    lon_c = lon[:grid.shape[1] * factor].reshape(-1, factor).mean(axis=1)
+    if OVERLAY_LAYERS[layer]['log']:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = np.where(grid > 0, np.log10(grid), np.nan)
+
+    lat_grid, lon_grid = np.meshgrid(lat_c, lon_c, indexing='ij')
+    valid = np.isfinite(grid)
+    return (lon_grid[valid].astype(np.float32), lat_grid[valid].astype(np.float32),
+            grid[valid].astype(np.float32))
+
+
+def overlay_grid(layer, date, region):
+    """
+    Downsampled overlay of layer for one date over region, as (lon, lat,
+    value) arrays of the non-empty cells, or None if the day has no source
+    file. Grids are generated on first request and cached on disk and in
+    memory, keyed by the version of the source file; a missing file is
+    looked up again on the next request.
+    """
+    path = source_file(layer, date)
+    if path is None:
+        return None
+    return _overlay_grid(layer, date, region, path, tuple(file_fingerprint(path)))
+
+
+@lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def _overlay_grid(layer, date, region, path, fingerprint):
+    key = hashlib.sha1(json.dumps([layer, list(map(float, region)), OVERLAY_MAX_CELLS,
+                                   list(fingerprint)]).encode()).hexdigest()
+    cache_file = os.path.join(OVERLAY_CACHE_DIR, f"{layer}_{pd.Timestamp(date).strftime('%Y%m%d')}_{key[:12]}.npz")
+
+    if os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as cached:
+                return cached['lon'], cached['lat'], cached['value']
+        except Exception as e:
+            print(f"Warning: rebuilding unreadable overlay {cache_file}: {e}")
+
+    try:
+        lon, lat, value = build_overlay(layer, path, region)
+    except Exception as e:
+        print(f"Warning: no {layer} overlay for {date}: {e}")
+        return None
+    write_npz_cache(cache_file, lon=lon, lat=lat, value=value)
+    return lon, lat, value
+
+
+def overlay_trace(layer, date, region):
+    """
+    The overlay as a scattergeo trace of square markers coloured by value,
+    to be drawn under the tracks, or None if there is no data for the date
+    in the region.
+    """
+    grid = overlay_grid(layer, pd.Timestamp(date).strftime('%Y-%m-%d'), tuple(region))
+    if grid is None or not np.isfinite(grid[2]).any():
+        return None
+    lon, lat, value = (np.round(a.astype(np.float64), OVERLAY_DECIMALS) for a in grid)
+    style = OVERLAY_LAYERS[layer]
+    cmin, cmax = style['range'] if style['range'] else (float(np.nanmin(value)), float(np.nanmax(value)))
+    # Squares about one grid cell wide when the region fills the map
+    size = max(4, math.ceil(MAP_PIXELS / max(1, len(np.unique(lon)))))
+    return dict(
+        type='scattergeo',
+        lon=lon,
+        lat=lat,
+        mode='markers',
+        name=style['label'],
+        marker=dict(symbol='square', size=size, color=value, colorscale=style['colorscale'],
+                    cmin=cmin, cmax=cmax, opacity=0.7,
+                    colorbar=dict(title=style['label'], x=1.0)),
+        hoverinfo='skip',
+        showlegend=False
+    )
@@ -1,47 +1,44 @@
-import xarray as xr
+import os
+import numpy as np
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
+from catalog import load_catalog, parse_swot_filename
+from swot_store import day_granules
 
 # --- Step 1: Load the CORRECT dataset ---
-try:
-    # MODIFICATION: Change the wildcard to select only the 'Expert' files.
-    # This tells xarray to ignore the WindWave files and open the ones with SSH data.
-    file_path = r"C:\Users\malla\Downloads\SWOT_L2_LR_SSH_Expert_032_166_20250503T222059_20250503T231127_PIC2_01.nc"
-    
-    ds = xr.open_mfdataset(file_path, 
-                           combine='nested', 
-                           concat_dim="num_lines", 
-                           decode_times=False)
-    
-    print("Expert dataset loaded successfully!")
-    # Let's confirm the right variables are here
-    print("\nAvailable data variables:")
-    print(list(ds.data_vars))
+# Only the 'Expert' (or 'Basic') files hold SSH; the WindWave files do not.
+# The granule is read from the compact SWOT store shared with the dataset
+# builder (see swot_store.py), which only keeps latitude, longitude, time and
+# ssha_karin, so it is built on first use and loads in a moment afterwards.
+SSH_DIR = r"D:\NASA_hackathon_2025\SSH"
+SWOT_STORE_DIR = r"D:\NASA_hackathon_2025\swot_store"
+granule_name = "SWOT_L2_LR_SSH_Expert_032_166_20250503T222059_20250503T231127_PIC2_01.nc"
+
+granule = None
+fields = parse_swot_filename(granule_name)
+if fields is not None:
+    date_str = fields['dates'][0]
+    catalog = load_catalog({'ssh': SSH_DIR})
+    day_files = catalog.files_for('ssh', date_str)
+    granule = next((g for g in day_granules(date_str, day_files, SWOT_STORE_DIR)
+                    if os.path.basename(g[0]) == granule_name), None) if day_files else None
 
-except FileNotFoundError:
-    print(f"Could not find files matching the pattern: {file_path}")
+if granule is None:
+    print(f"Could not find an SSH granule named {granule_name} in {SSH_DIR}")
     print("Please check your download folder for files containing 'Expert' or 'Basic' in their name.")
-    ds = xr.Dataset()
+else:
+    print("Expert granule loaded successfully!")
 
 # --- Step 2: Plot the data ---
 
-# The variable name for SSHA in the Expert/Basic files is often just 'ssha'
-# or it could be 'ssha_karin'. We'll check for both.
-ssha_var_name = None
-if 'ssha' in ds.data_vars:
-    ssha_var_name = 'ssha'
-elif 'ssha_karin' in ds.data_vars:
-    ssha_var_name = 'ssha_karin'
-
-if ssha_var_name:
-    print(f"\nFound SSHA variable: '{ssha_var_name}'. Proceeding to plot...")
+if granule is not None:
+    print("\nFound SSHA variable: 'ssha_karin'. Proceeding to plot...")
     
-    # Select the specific variable we want to plot
-    ssha_to_plot = ds[ssha_var_name]
-
-    # Select the corresponding coordinates
-    lon = ds['longitude']
-    lat = ds['latitude']
+    # Lines without any ssha_karin are not in the store, so plot the swath
+    # points that have a value
+    _, _, points = granule
+    points = points[np.isfinite(points).all(axis=1)]
+    lat, lon, ssha_to_plot = points[:, 0], points[:, 1], points[:, 2]
 
     # Create a figure and a map projection
     fig, ax = plt.subplots(
@@ -49,11 +46,11 @@ if ssha_var_name:
         subplot_kw={'projection': ccrs.PlateCarree()}
     )
 
-    # Create the 2D plot
-    im = ax.pcolormesh(lon, lat, ssha_to_plot, 
-                       transform=ccrs.PlateCarree(), 
-                       cmap='coolwarm',
-                       vmin=-0.5, vmax=0.5)
+    # Plot the swath points
+    im = ax.scatter(lon, lat, c=ssha_to_plot, s=1,
+                    transform=ccrs.PlateCarree(), 
+                    cmap='coolwarm',
+                    vmin=-0.5, vmax=0.5)
 
     # Add map features
     ax.coastlines()
@@ -66,5 +63,4 @@ if ssha_var_name:
 
     plt.show()
 else:
-    print("\nCould not find 'ssha' or 'ssha_karin' in the dataset.")
-    print("Please check the list of available variables printed above and update the script if needed.")
\ No newline at end of file
+    print("\nNothing to plot.")
\ No newline at end of file
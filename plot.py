@@ -1,28 +1,85 @@
+import numpy as np
 import pandas as pd
-import glob
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import plotly.graph_objects as go
+from dash.dependencies import Input, Output, State
+from shark_tracks import load_shark_tracks
+from track_lod import TrackLOD, choose_level
+from overlay_grids import OVERLAY_LAYERS, overlay_trace
 
 # -----------------------------
-# Step 1: Load all CSV files
+# Step 1: Load all CSV files (only id/date/lat/lon, streamed in chunks)
 # -----------------------------
-files = glob.glob(r"D:\NASA_hackathon_2025\shark_data\*.csv")
-all_data = [pd.read_csv(f) for f in files]
-data = pd.concat(all_data, ignore_index=True)
+data = load_shark_tracks(r"D:\NASA_hackathon_2025\shark_data")
 
 # -----------------------------
 # Step 2: Prepare data
 # -----------------------------
-data['date'] = pd.to_datetime(data['date'])
-data = data.sort_values(['id', 'date'])
-plane_ids = data['id'].unique()
+data = data.sort_values(['id', 'date'], kind='stable')
+plane_ids = data['id'].dropna().unique()
 
 # Optional: reduce number of frames for performance
 data['time_frame'] = data['date'].dt.floor('1H')  # 1-hour resolution
 time_frames = sorted(data['time_frame'].unique())
 
+# Per-shark, time-sorted arrays built once: a callback only needs a
+# searchsorted per shark to find the pings up to the slider time
+tracks = {}
+for pid, group in data.groupby('id', observed=True, sort=False):
+    tracks[pid] = {
+        'frame': group['time_frame'].values.astype('datetime64[ns]').astype(np.int64),
+        'lon': group['lon'].to_numpy(),
+        'lat': group['lat'].to_numpy(),
+        'hover': group['date'].astype(str).to_numpy(),
+    }
+
+# Tracks are simplified (Douglas-Peucker) to the level of detail the view
+# can show: a shark's whole track at the default zoom, finer when zoomed in
+lod = TrackLOD(tracks)
+extents = {pid: (track['lon'].min(), track['lon'].max(), track['lat'].min(), track['lat'].max())
+           for pid, track in tracks.items()}
+
+
+# Environmental overlays cover all tracks plus this margin (degrees)
+OVERLAY_MARGIN = 2.0
+overlay_region = (min(e[2] for e in extents.values()) - OVERLAY_MARGIN, max(e[3] for e in extents.values()) + OVERLAY_MARGIN,
+                  min(e[0] for e in extents.values()) - OVERLAY_MARGIN, max(e[1] for e in extents.values()) + OVERLAY_MARGIN)
+
+
+def view_level(selected, zoom_scale):
+    lon_min = min(extents[pid][0] for pid in selected)
+    lon_max = max(extents[pid][1] for pid in selected)
+    lat_min = min(extents[pid][2] for pid in selected)
+    lat_max = max(extents[pid][3] for pid in selected)
+    return choose_level(max(lon_max - lon_min, lat_max - lat_min), zoom_scale)
+
+
+def track_points(pid, level, n_pings, n_before=0):
+    """
+    Points of a shark's track drawn for its first n_pings pings at a level
+    of detail (see TrackLOD.visible), only those added since n_before.
+    """
+    track = tracks[pid]
+    idx = lod.visible(pid, level, n_pings, n_before)
+    return track['lon'][idx], track['lat'][idx], track['hover'][idx]
+
+
+# Traces are plain dicts: Dash sends them as they are, without plotly
+# re-validating every point on each slider move. Only the kept indices of
+# each (shark, level) are cached (in lod), so memory does not grow with use
+def shark_trace(pid, level, n_pings):
+    lon, lat, hover = track_points(pid, level, n_pings)
+    return dict(
+        type='scattergeo',
+        lon=lon,
+        lat=lat,
+        mode='lines+markers',
+        name=pid,
+        line=dict(width=2),
+        marker=dict(size=6),
+        hovertext=hover
+    )
+
 # -----------------------------
 # Step 3: Initialize Dash app
 # -----------------------------
@@ -36,6 +93,13 @@ app.layout = html.Div([
         value='All'
     ),
     html.Button("Clear Selection", id='clear-btn', n_clicks=0),
+    html.Label("Overlay:"),
+    dcc.Dropdown(
+        id='overlay-dropdown',
+        options=[{'label': 'None', 'value': 'none'}] + [{'label': style['label'], 'value': layer} for layer, style in OVERLAY_LAYERS.items()],
+        value='none'
+    ),
+    html.H3(id='map-title'),
     dcc.Slider(
         id='time-slider',
         min=0,
@@ -45,7 +109,9 @@ app.layout = html.Div([
         marks={i: str(time_frames[i].strftime('%Y-%m-%d %H:%M')) for i in range(0, len(time_frames), max(1, len(time_frames)//10))},
         tooltip={"placement": "bottom", "always_visible": True}
     ),
-    dcc.Graph(id='plane-map', style={'height': '700px'})
+    dcc.Graph(id='plane-map', style={'height': '700px'}),
+    # What the browser currently shows, so slider steps can send only new points
+    dcc.Store(id='sent-state')
 ])
 
 # -----------------------------
@@ -53,37 +119,66 @@ app.layout = html.Div([
 # -----------------------------
 @app.callback(
     Output('plane-map', 'figure'),
+    Output('plane-map', 'extendData'),
+    Output('map-title', 'children'),
+    Output('sent-state', 'data'),
     Input('plane-dropdown', 'value'),
     Input('time-slider', 'value'),
-    Input('clear-btn', 'n_clicks')
+    Input('clear-btn', 'n_clicks'),
+    Input('plane-map', 'relayoutData'),
+    Input('overlay-dropdown', 'value'),
+    State('sent-state', 'data')
 )
-def update_map(selected_plane, slider_index, clear_clicks):
+def update_map(selected_plane, slider_index, clear_clicks, relayout, overlay, sent):
     current_time = time_frames[slider_index]
+    current_ns = pd.Timestamp(current_time).value
+    title = f"SHARK Movements until {current_time}"
     
     if selected_plane == 'All' or selected_plane is None:
-        filtered_data = data[data['time_frame'] <= current_time]
+        selected = list(tracks.keys())
     else:
-        filtered_data = data[(data['id'] == selected_plane) & (data['time_frame'] <= current_time)]
+        selected = [selected_plane] if selected_plane in tracks else []
     
-    fig = go.Figure()
+    zoom_scale = (relayout or {}).get('geo.projection.scale', (sent or {}).get('zoom_scale', 1.0))
+    level = view_level(selected, zoom_scale) if selected else 0
     
-    # Draw paths for each plane
-    for pid in filtered_data['id'].unique():
-        plane_data = filtered_data[filtered_data['id'] == pid]
-        fig.add_trace(go.Scattergeo(
-            lon=plane_data['lon'],
-            lat=plane_data['lat'],
-            mode='lines+markers',
-            name=pid,
-            line=dict(width=2),
-            marker=dict(size=6),
-            hovertext=plane_data['date'].astype(str)
-        ))
+    # Pings of each plane up to current_time, drawn as a prefix of its
+    # simplified track that ends at the newest ping
+    counts = {}
+    for pid in selected:
+        counts[pid] = int(np.searchsorted(tracks[pid]['frame'], current_ns, side='right'))
+    shown = [pid for pid in selected if counts[pid]]
+    overlay_date = str(current_time.date()) if overlay and overlay != 'none' else None
+    state = {'key': [selected_plane, level, overlay, overlay_date], 'zoom_scale': zoom_scale,
+             'shown': shown, 'counts': [counts[pid] for pid in shown]}
     
-    fig.update_geos(showcoastlines=True, showland=True, showcountries=True, fitbounds="locations")
-    fig.update_layout(title=f"SHARK Movements until {current_time}", margin={"r":0,"t":50,"l":0,"b":0})
+    # Same sharks, level and overlay day, slider moved forward: only send the newest
+    # segments (the previous newest ping stays drawn as an extra vertex)
+    if sent and sent['key'] == state['key'] and sent['shown'] == shown \
+            and all(now >= before for now, before in zip(state['counts'], sent['counts'])):
+        if state['counts'] == sent['counts']:
+            return dash.no_update, dash.no_update, title, state
+        segments = [track_points(pid, level, counts[pid], before) for pid, before in zip(shown, sent['counts'])]
+        new_points = {
+            'lon': [lon for lon, _, _ in segments],
+            'lat': [lat for _, lat, _ in segments],
+            'hovertext': [hover for _, _, hover in segments],
+        }
+        first_track = sent.get('first_track', 0)
+        return dash.no_update, (new_points, list(range(first_track, first_track + len(shown)))), title, state
     
-    return fig
+    # The overlay (a cached, downsampled daily grid) is drawn under the tracks
+    background = overlay_trace(overlay, overlay_date, overlay_region) if overlay_date else None
+    state['first_track'] = 0 if background is None else 1
+    figure = {
+        'data': ([background] if background else []) + [shark_trace(pid, level, counts[pid]) for pid in shown],
+        'layout': dict(
+            geo=dict(showcoastlines=True, showland=True, showcountries=True, fitbounds="locations"),
+            margin={"r":0,"t":50,"l":0,"b":0},
+            uirevision=str(selected_plane)  # keep the user's zoom across redraws
+        )
+    }
+    return figure, dash.no_update, title, state
 
 # -----------------------------
 # Step 5: Run app
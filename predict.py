@@ -2,15 +2,16 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 import joblib  
+from dataset_io import read_training_dataset
 
 # --- CONFIGURATION ---
-TRAINING_DATA_FILE = r'D:\NASA_hackathon_2025\training_dataset_one_month.csv'
+TRAINING_DATA_FILE = r'D:\NASA_hackathon_2025\training_dataset'  # Parquet dataset or .csv export
 FEATURES = ['chlor_a', 'carbon_phyto', 'sst', 'ssha_karin']
 TARGET = 'presence'
 MODEL_FILE = r'D:\NASA_hackathon_2025\shark_rf_model.pkl'  # Path to save trained model
 
 # --- 1. LOAD TRAINING DATA ---
-df = pd.read_csv(TRAINING_DATA_FILE)
+df = read_training_dataset(TRAINING_DATA_FILE, columns=FEATURES + [TARGET])
 
 # Drop rows with missing values in features or target
 df.dropna(subset=FEATURES + [TARGET], inplace=True)
@@ -0,0 +1,186 @@
+import json
+import time
+import queue
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import pandas as pd
+from forest_artifact import load_model
+
+# --- 1. CONFIGURATION ---
+# Forest artifact written by tain.py (memory-mapped), or a .joblib model
+MODEL_FILE = r"D:\NASA_hackathon_2025\shark_rf_model.forest"
+
+# Columns expected by the model (must match training)
+FEATURES = ['chlor_a', 'carbon_phyto', 'sst', 'ssha_karin']
+
+# Probability threshold for predicting presence
+THRESHOLD = 0.5
+
+HOST = '127.0.0.1'
+PORT = 8765
+SERVER_URL = f"http://{HOST}:{PORT}"
+
+# Concurrent requests are merged into one predict_proba call of at most
+# MAX_BATCH_ROWS rows; a batch waits at most MAX_WAIT_MS after its first
+# request for more requests to arrive
+MAX_BATCH_ROWS = 50_000
+MAX_WAIT_MS = 5
+
+
+# --- 2. SERVER ---
+
+class MicroBatcher:
+    """
+    Collects scoring requests from many threads and runs them through the
+    model in shared predict_proba calls on a single worker thread.
+    """
+
+    def __init__(self, model, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def score(self, X):
+        """
+        Blocks until the rows of X (n_rows x n_features) are scored and
+        returns their presence probabilities.
+        """
+        done = threading.Event()
+        job = {'X': X, 'done': done, 'result': None, 'error': None}
+        self._requests.put(job)
+        done.wait()
+        if job['error'] is not None:
+            raise job['error']
+        return job['result']
+
+    def _run(self):
+        while True:
+            jobs = [self._requests.get()]
+            n_rows = len(jobs[0]['X'])
+            # One deadline per batch, so a steady stream of requests cannot hold it open
+            deadline = time.monotonic() + self.max_wait
+            while n_rows < self.max_batch_rows:
+                try:
+                    job = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                n_rows += len(job['X'])
+
+            try:
+                X = pd.DataFrame(np.concatenate([job['X'] for job in jobs]), columns=FEATURES)
+                probs = self.model.predict_proba(X)[:, 1]
+                offset = 0
+                for job in jobs:
+                    job['result'] = probs[offset:offset + len(job['X'])]
+                    offset += len(job['X'])
+            except Exception as e:
+                for job in jobs:
+                    job['error'] = e
+            for job in jobs:
+                job['done'].set()
+
+
+def rows_to_array(payload):
+    """
+    Converts a request body into an (n_rows, n_features) float array. Accepts
+    {"rows": [[...], ...]} in FEATURES order or {"records": [{feature: value}, ...]}.
+    """
+    if 'rows' in payload:
+        X = np.asarray(payload['rows'], dtype=np.float64)
+    elif 'records' in payload:
+        X = np.asarray([[record[f] for f in FEATURES] for record in payload['records']], dtype=np.float64)
+    else:
+        raise ValueError("Request must contain 'rows' or 'records'.")
+    if X.ndim != 2 or X.shape[1] != len(FEATURES):
+        raise ValueError(f"Expected rows of {len(FEATURES)} features: {FEATURES}")
+    return X
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    batcher = None
+    threshold = THRESHOLD
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'features': FEATURES, 'threshold': self.threshold})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            X = rows_to_array(json.loads(self.rfile.read(length)))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            probs = self.batcher.score(X)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {
+            'probability': probs.tolist(),
+            'presence': (probs >= self.threshold).astype(int).tolist(),
+            'threshold': self.threshold,
+        })
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet under load
+
+
+def run_server(model_file=MODEL_FILE, host=HOST, port=PORT, threshold=THRESHOLD):
+    """
+    Loads the model once and serves POST /predict and GET /health until interrupted.
+    """
+    print(f"Loading model from '{model_file}'...")
+    model = load_model(model_file)
+    ScoringHandler.batcher = MicroBatcher(model)
+    ScoringHandler.threshold = threshold
+
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    print(f"Scoring server listening on http://{host}:{port} (threshold={threshold})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+
+
+# --- 3. CLIENT ---
+
+def score_rows(X, url=SERVER_URL, timeout=30):
+    """
+    Scores feature rows (DataFrame with FEATURES columns, or an array in that
+    order) on a running server. Returns (probabilities, predicted presence).
+    Raises OSError if the server is not reachable.
+    """
+    if isinstance(X, pd.DataFrame):
+        X = X[FEATURES].to_numpy(dtype=np.float64)
+    body = json.dumps({'rows': np.asarray(X, dtype=np.float64).tolist()}).encode()
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        result = json.loads(response.read())
+    return np.asarray(result['probability']), np.asarray(result['presence'])
+
+
+if __name__ == "__main__":
+    run_server()
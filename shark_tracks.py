@@ -0,0 +1,71 @@
+import os
+import glob
+import pandas as pd
+
+# --- CONFIGURATION ---
+BASE_DIR = r"D:\NASA_hackathon_2025"
+SHARK_DATA_DIR = os.path.join(BASE_DIR, 'shark_data')
+
+# Only these columns of the telemetry CSVs are read
+TRACK_COLUMNS = ['id', 'date', 'lat', 'lon']
+REQUIRED_COLUMNS = ['date', 'lat', 'lon']
+TRACK_DTYPES = {'id': 'str', 'lat': 'float64', 'lon': 'float64'}
+
+# Rows parsed per chunk while streaming a file
+CHUNK_SIZE = 200_000
+
+
+# --- SCRIPT ---
+
+def iter_track_chunks(files, start=None, end=None, chunksize=CHUNK_SIZE):
+    """
+    Streams the id/date/lat/lon columns of the telemetry CSVs chunk by chunk,
+    keeping only rows with start <= date <= end (either bound optional).
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    for file_path in files:
+        reader = pd.read_csv(file_path, usecols=lambda c: c in TRACK_COLUMNS,
+                             dtype=TRACK_DTYPES, chunksize=chunksize)
+        for chunk in reader:
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"{file_path} is missing required column(s): {missing}")
+
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            keep = chunk['date'].notna()
+            if start is not None:
+                keep &= chunk['date'] >= start
+            if end is not None:
+                keep &= chunk['date'] <= end
+            if keep.any():
+                yield chunk[keep]
+
+
+def load_shark_tracks(data_dir=SHARK_DATA_DIR, start=None, end=None, pattern='*.csv', chunksize=CHUNK_SIZE):
+    """
+    Loads every telemetry CSV in data_dir into one compact, time-sorted table
+    with columns id (categorical), date, lat, lon. The date window is applied
+    while streaming, so rows outside it are never held in memory.
+    """
+    files = sorted(glob.glob(os.path.join(data_dir, pattern)))
+    chunks = list(iter_track_chunks(files, start, end, chunksize))
+
+    if chunks:
+        tracks = pd.concat(chunks, ignore_index=True)
+    else:
+        tracks = pd.DataFrame({c: pd.Series(dtype=TRACK_DTYPES.get(c, 'datetime64[ns]')) for c in TRACK_COLUMNS})
+    if 'id' not in tracks.columns:
+        tracks['id'] = pd.NA
+    tracks['id'] = tracks['id'].astype('category')
+
+    tracks = tracks[TRACK_COLUMNS].sort_values('date', kind='stable').reset_index(drop=True)
+    print(f"Loaded {len(tracks)} track points from {len(files)} file(s).")
+    return tracks
+
+
+if __name__ == "__main__":
+    tracks = load_shark_tracks()
+    print(tracks.head())
+    print(f"{tracks['id'].nunique()} tag(s), {tracks['date'].min()} to {tracks['date'].max()}")
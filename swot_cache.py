@@ -0,0 +1,137 @@
+import os
+import json
+import tempfile
+import numpy as np
+import xarray as xr
+import joblib
+from scipy.spatial import cKDTree
+
+# --- CONFIGURATION ---
+# SSH variables tried in order when reading a SWOT granule
+SSH_VAR_CANDIDATES = ['ssha_karin', 'ssh_karin', 'ssha', 'ssha_karin_2']
+
+CACHE_VERSION = 1
+
+
+# --- SCRIPT ---
+
+def file_fingerprint(path):
+    """
+    Identifies one version of a source file by name, size and modification time.
+    """
+    st = os.stat(path)
+    return [os.path.basename(path), st.st_size, st.st_mtime_ns]
+
+
+def write_npz_cache(cache_file, **arrays):
+    """
+    Saves arrays to cache_file through a uniquely named temporary file, so
+    processes and threads writing the same cache entry never collide. A
+    failed write is only a warning: the cache is rebuilt next time.
+    """
+    tmp_file = None
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix='.tmp.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        print(f"Warning: could not write cache file {cache_file}: {e}")
+        if tmp_file and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def read_swot_granule(swot_file):
+    """
+    Reads one SWOT granule and returns (swath shape, points), where points is
+    an (num_lines * num_pixels, 3) float64 array of latitude, longitude,
+    ssha_karin in swath order, NaNs included. Returns (None, None) if the
+    file has no SSH variable.
+    """
+    with xr.open_dataset(swot_file) as ds:
+        # Flexible variable detection
+        ssh_var = next((var for var in SSH_VAR_CANDIDATES if var in ds.variables), None)
+        if ssh_var is None:
+            return None, None
+
+        shape = ds[ssh_var].shape
+        points = np.column_stack([
+            ds['latitude'].values.ravel(),
+            ds['longitude'].values.ravel(),
+            ds[ssh_var].values.ravel()
+        ]).astype(np.float64)
+    return shape, points
+
+
+def read_swot_points(swot_file):
+    """
+    Reads one SWOT granule and returns its NaN-dropped points as an (N, 3)
+    float64 array of latitude, longitude, ssha_karin, or None if the file
+    has no SSH variable or no valid points.
+    """
+    _, points = read_swot_granule(swot_file)
+    if points is None:
+        return None
+
+    points = points[np.isfinite(points).all(axis=1)]
+    return points if len(points) else None
+
+
+def _day_cache_paths(cache_dir, date_str):
+    day_dir = os.path.join(cache_dir, date_str)
+    return (day_dir,
+            os.path.join(day_dir, 'manifest.json'),
+            os.path.join(day_dir, 'points.npy'),
+            os.path.join(day_dir, 'tree.joblib'))
+
+
+def load_swot_day(date_str, swot_files, cache_dir, granules=None):
+    """
+    Returns (points, tree) for all SWOT granules of one day, where points is
+    an (N, 3) array of latitude, longitude, ssha_karin and tree is a cKDTree
+    over its latitude/longitude columns. Returns (None, None) if the day has
+    no valid points. granules, if given, is a function returning the day's
+    (swot_file, shape, points) tuples (e.g. from swot_store.day_granules),
+    called instead of reading the raw files when the cache is rebuilt.
+
+    The prepared arrays are cached under cache_dir/<date_str>/ and keyed by
+    the fingerprints of the source files; a cached day is loaded through
+    memory-mapped arrays and only rebuilt when one of its files changed.
+    """
+    swot_files = sorted(swot_files)
+    fingerprints = [file_fingerprint(f) for f in swot_files]
+    day_dir, manifest_path, points_path, tree_path = _day_cache_paths(cache_dir, date_str)
+
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == CACHE_VERSION and manifest.get('files') == fingerprints:
+                if manifest['n_points'] == 0:
+                    return None, None
+                points = np.load(points_path, mmap_mode='r')
+                tree = joblib.load(tree_path, mmap_mode='r')
+                return points, tree
+        except Exception as e:
+            print(f"Warning: ignoring unreadable SWOT cache for {date_str}: {e}")
+
+    if granules is not None:
+        daily_points = [p[np.isfinite(p).all(axis=1)] for _, _, p in granules()]
+        daily_points = [p for p in daily_points if len(p)]
+    else:
+        daily_points = [p for p in (read_swot_points(f) for f in swot_files) if p is not None]
+    points = np.concatenate(daily_points) if daily_points else np.empty((0, 3))
+    tree = cKDTree(points[:, :2]) if len(points) else None
+
+    # The manifest is written last, so an interrupted write is never trusted
+    os.makedirs(day_dir, exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    if tree is not None:
+        np.save(points_path, points)
+        joblib.dump(tree, tree_path)
+    with open(manifest_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'files': fingerprints, 'n_points': len(points)}, f)
+
+    return (points, tree) if tree is not None else (None, None)
@@ -0,0 +1,124 @@
+import os
+import json
+from datetime import date, datetime, timedelta
+import numpy as np
+import xarray as xr
+
+from catalog import parse_swot_filename
+
+# --- CONFIGURATION ---
+# SWOT product variants that hold ssha_karin (WindWave has no SSH)
+SSH_VARIANTS = ['Expert', 'Basic', 'Unsmoothed']
+
+# Pass footprints are stored as the 1x1 degree cells their swath touches
+FOOTPRINT_CELL_DEGREES = 1.0
+
+
+# --- SCRIPT ---
+
+def granule_footprint(swot_file):
+    """
+    Sorted [lat, lon] lower-left corners of the FOOTPRINT_CELL_DEGREES cells
+    the swath of one granule covers, with longitudes in -180..180.
+    """
+    with xr.open_dataset(swot_file) as ds:
+        lat = ds['latitude'].values.ravel()
+        lon = ds['longitude'].values.ravel()
+    valid = np.isfinite(lat) & np.isfinite(lon)
+    lon = (lon[valid] + 180.0) % 360.0 - 180.0
+    cells = np.floor(np.column_stack([lat[valid], lon]) / FOOTPRINT_CELL_DEGREES) * FOOTPRINT_CELL_DEGREES
+    return np.unique(cells, axis=0).tolist()
+
+
+def load_pass_footprints(swot_files, cache_file):
+    """
+    Footprint of every pass seen in swot_files ({pass: cells}). SWOT repeats
+    its ground tracks each cycle, so one local granule per pass is read;
+    footprints are kept in cache_file and only new passes are added.
+    """
+    footprints = {}
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            footprints = json.load(f)
+
+    added = 0
+    for swot_file in sorted(swot_files):
+        fields = parse_swot_filename(swot_file)
+        if fields is None or str(fields['pass']) in footprints:
+            continue
+        try:
+            footprints[str(fields['pass'])] = granule_footprint(swot_file)
+            added += 1
+        except Exception as e:
+            print(f"Warning: could not read the footprint of {os.path.basename(swot_file)}: {e}")
+
+    if added:
+        with open(cache_file, 'w') as f:
+            json.dump(footprints, f)
+        print(f"Added {added} pass footprint(s) to '{cache_file}'")
+    return {int(p): cells for p, cells in footprints.items()}
+
+
+def crosses_bbox(cells, bbox):
+    """
+    True if any footprint cell overlaps bbox (min_lat, max_lat, min_lon, max_lon).
+    """
+    if not cells:
+        return False
+    min_lat, max_lat, min_lon, max_lon = bbox
+    cells = np.asarray(cells)
+    return bool(np.any((cells[:, 0] + FOOTPRINT_CELL_DEGREES > min_lat) & (cells[:, 0] < max_lat) &
+                       (cells[:, 1] + FOOTPRINT_CELL_DEGREES > min_lon) & (cells[:, 1] < max_lon)))
+
+
+def study_area_passes(footprints, bbox):
+    return {p for p, cells in footprints.items() if crosses_bbox(cells, bbox)}
+
+
+def window_bound(value, end=False):
+    """
+    A start or end of a time window as a datetime. A date given without a
+    time (e.g. "2024-12-31") starts at midnight; as an end it covers the
+    whole day, up to the next midnight.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        if 'T' in value or ' ' in value:
+            return datetime.fromisoformat(value)
+        value = date.fromisoformat(value)
+    bound = datetime(value.year, value.month, value.day)
+    return bound + timedelta(days=1) if end else bound
+
+
+def filter_swot_links(links, variants=None, cycles=None, passes=None, start=None, end=None, exclude_passes=None):
+    """
+    Keeps the SWOT links whose granule matches every given criterion:
+    product variant, cycle and pass numbers, and a time window (granules
+    overlapping start..end; a date-only end includes that whole day, see
+    window_bound). Passes in exclude_passes (e.g. those known not to cross
+    the study area) are dropped. Criteria left as None are not applied.
+    Returns (kept, reasons), where reasons counts the dropped links per criterion.
+    """
+    start = window_bound(start)
+    end = window_bound(end, end=True)
+    kept = []
+    reasons = {'not a SWOT granule': 0, 'variant': 0, 'cycle': 0, 'pass': 0, 'study area': 0, 'time window': 0}
+    for link in links:
+        fields = parse_swot_filename(link.rstrip('/').split('/')[-1])
+        if fields is None:
+            reasons['not a SWOT granule'] += 1
+        elif variants is not None and fields['variant'] not in variants:
+            reasons['variant'] += 1
+        elif cycles is not None and fields['cycle'] not in cycles:
+            reasons['cycle'] += 1
+        elif passes is not None and fields['pass'] not in passes:
+            reasons['pass'] += 1
+        elif exclude_passes is not None and fields['pass'] in exclude_passes:
+            reasons['study area'] += 1
+        elif (start is not None and datetime.fromisoformat(fields['end']) < start) or \
+                (end is not None and datetime.fromisoformat(fields['start']) > end):
+            reasons['time window'] += 1
+        else:
+            kept.append(link)
+    return kept, reasons
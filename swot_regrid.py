@@ -0,0 +1,211 @@
+import os
+import numpy as np
+from scipy.spatial import cKDTree
+
+from catalog import parse_swot_filename
+from swot_cache import read_swot_granule, write_npz_cache
+
+# --- CONFIGURATION ---
+# MODIS L3m 4km global grid: cell centres at 90 - (i + 0.5) * 180 / 4320 and -180 + (j + 0.5) * 360 / 8640
+GRID_NLAT = 4320
+GRID_NLON = 8640
+
+# Grid cells farther than this from every swath point get no ssha_karin
+MAX_DISTANCE_KM = 10.0
+
+# Swath points combined (inverse-distance weights) per grid cell
+N_NEIGHBOURS = 4
+
+# A cached pass mapping is reused for another cycle if its swath has the same
+# shape and its sampled geolocation is within this distance
+GEOMETRY_TOLERANCE_KM = 2.0
+
+EARTH_RADIUS_KM = 6371.0
+MAPPING_VERSION = 2
+
+
+# --- SCRIPT ---
+
+def to_unit_xyz(lats, lons):
+    """
+    Converts degrees to points on the unit sphere, so chord distances work
+    across the dateline and for 0..360 SWOT longitudes alike.
+    """
+    lat = np.radians(lats)
+    lon = np.radians(lons)
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def grid_cell_index(lats, lons):
+    """
+    Flat index (row * GRID_NLON + col) of the MODIS 4km cell containing each point.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = (np.asarray(lons, dtype=np.float64) + 180.0) % 360.0 - 180.0
+    rows = np.clip(np.floor((90.0 - lats) * GRID_NLAT / 180.0), 0, GRID_NLAT - 1).astype(np.int64)
+    cols = np.clip(np.floor((lons + 180.0) * GRID_NLON / 360.0), 0, GRID_NLON - 1).astype(np.int64)
+    return rows * GRID_NLON + cols
+
+
+def grid_cell_centres(cells):
+    """
+    Latitude/longitude of the centres of flat cell indices.
+    """
+    rows, cols = np.divmod(np.asarray(cells, dtype=np.int64), GRID_NLON)
+    return 90.0 - (rows + 0.5) * 180.0 / GRID_NLAT, -180.0 + (cols + 0.5) * 360.0 / GRID_NLON
+
+
+def build_mapping(lats, lons):
+    """
+    Maps MODIS grid cells to the swath points of one granule.
+
+    Candidate cells are those containing a swath point, dilated by
+    MAX_DISTANCE_KM; each keeps its N_NEIGHBOURS nearest swath points within
+    MAX_DISTANCE_KM. Returns a dict of cells (sorted flat indices), index
+    (n_cells, N_NEIGHBOURS; -1 = none) into the flattened swath, and
+    distance_km (inf where index is -1). Cells with no point in range are
+    masked out by not being listed.
+    """
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    swath_index = np.flatnonzero(valid)
+    tree = cKDTree(to_unit_xyz(lats[valid], lons[valid]))
+
+    cell_km = 180.0 / GRID_NLAT * np.pi / 180.0 * EARTH_RADIUS_KM
+    max_abs_lat = min(np.abs(lats[valid]).max(), 85.0)
+    r_lat = int(np.ceil(MAX_DISTANCE_KM / cell_km))
+    r_lon = int(np.ceil(MAX_DISTANCE_KM / (cell_km * np.cos(np.radians(max_abs_lat)))))
+
+    covered = np.unique(grid_cell_index(lats[valid], lons[valid]))
+    rows, cols = np.divmod(covered, GRID_NLON)
+    candidates = []
+    for dr in range(-r_lat, r_lat + 1):
+        r = rows + dr
+        inside = (r >= 0) & (r < GRID_NLAT)
+        for dc in range(-r_lon, r_lon + 1):
+            candidates.append(r[inside] * GRID_NLON + (cols[inside] + dc) % GRID_NLON)
+    cells = np.unique(np.concatenate(candidates))
+
+    centre_lat, centre_lon = grid_cell_centres(cells)
+    chord, neighbours = tree.query(to_unit_xyz(centre_lat, centre_lon), k=N_NEIGHBOURS,
+                                   distance_upper_bound=MAX_DISTANCE_KM / EARTH_RADIUS_KM)
+    chord = chord.reshape(len(cells), N_NEIGHBOURS)
+    neighbours = neighbours.reshape(len(cells), N_NEIGHBOURS)
+
+    in_range = np.isfinite(chord)
+    keep = in_range[:, 0]
+    index = np.where(in_range, swath_index[np.minimum(neighbours, len(swath_index) - 1)], -1)
+    distance_km = 2.0 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.where(in_range, chord, 0.0) / 2.0, 1.0))
+    distance_km[~in_range] = np.inf
+
+    return {
+        'cells': cells[keep],
+        'index': index[keep].astype(np.int32),
+        'distance_km': distance_km[keep].astype(np.float32),
+    }
+
+
+def _geometry_sample(lats, lons, n=16):
+    positions = np.linspace(0, len(lats) - 1, n).astype(np.int64)
+    return positions, lats[positions], lons[positions]
+
+
+def _same_geometry(cached, lats, lons):
+    positions = cached['sample_positions']
+    a = to_unit_xyz(cached['sample_lats'], cached['sample_lons'])
+    b = to_unit_xyz(lats[positions], lons[positions])
+    finite = np.isfinite(a).all(axis=1) & np.isfinite(b).all(axis=1)
+    if not finite.any():
+        return False
+    return np.all(np.linalg.norm(a[finite] - b[finite], axis=1) * EARTH_RADIUS_KM <= GEOMETRY_TOLERANCE_KM)
+
+
+def load_mapping(swot_file, shape, lats, lons, cache_dir):
+    """
+    Returns the grid mapping for a granule, reusing the one cached for its
+    pass (SWOT repeats its ground tracks every cycle) when the swath shape
+    and geolocation match, and building and caching it otherwise. Granules
+    read from swot_store lack the lines with no ssha_karin, so a cached
+    mapping is only reused for a swath with no more located points than the
+    one it was built from.
+    """
+    fields = parse_swot_filename(swot_file)
+    n_located = int((np.isfinite(lats) & np.isfinite(lons)).sum())
+    key = f"pass_{fields['pass']:03d}" if fields else os.path.splitext(os.path.basename(swot_file))[0]
+    cache_file = os.path.join(cache_dir, f"{key}_{shape[0]}x{shape[1] if len(shape) > 1 else 1}.npz")
+
+    if os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as cached:
+                if int(cached['version']) == MAPPING_VERSION and float(cached['max_distance_km']) == MAX_DISTANCE_KM \
+                        and n_located <= int(cached['n_located']) and _same_geometry(cached, lats, lons):
+                    return {name: cached[name] for name in ['cells', 'index', 'distance_km']}
+        except Exception as e:
+            print(f"Warning: rebuilding unreadable regrid cache {cache_file}: {e}")
+
+    mapping = build_mapping(lats, lons)
+    positions, sample_lats, sample_lons = _geometry_sample(lats, lons)
+    write_npz_cache(cache_file, version=MAPPING_VERSION, max_distance_km=MAX_DISTANCE_KM, n_located=n_located,
+                    sample_positions=positions, sample_lats=sample_lats, sample_lons=sample_lons, **mapping)
+    return mapping
+
+
+def apply_mapping(mapping, values):
+    """
+    Inverse-distance weighted ssha per mapped cell from the granule's flat
+    values; neighbours with NaN values are ignored. Returns (cells, values),
+    dropping cells where no neighbour has a value.
+    """
+    index = mapping['index']
+    neighbour_values = np.where(index >= 0, values[np.maximum(index, 0)], np.nan)
+    weights = 1.0 / np.maximum(mapping['distance_km'].astype(np.float64), 1e-3)
+    weights = np.where(np.isfinite(neighbour_values), weights, 0.0)
+    total = weights.sum(axis=1)
+    has_value = total > 0
+    cell_values = (np.nan_to_num(neighbour_values) * weights).sum(axis=1)[has_value] / total[has_value]
+    return mapping['cells'][has_value], cell_values
+
+
+def regrid_swot_day(swot_files, cache_dir, granules=None):
+    """
+    Regrids all SWOT granules of a day onto the MODIS 4km grid. Returns
+    (cells, values): sorted flat cell indices and their ssha_karin, with
+    overlapping granules averaged. granules, if given, is a function
+    returning the day's (swot_file, shape, points) tuples (e.g. from
+    swot_store.day_granules), called instead of reading the raw files.
+    """
+    if granules is not None:
+        day_granules = granules()
+    else:
+        day_granules = ((f,) + read_swot_granule(f) for f in sorted(swot_files))
+
+    all_cells, all_values = [], []
+    for swot_file, shape, points in day_granules:
+        if points is None or not np.isfinite(points[:, :2]).any():
+            continue
+        mapping = load_mapping(swot_file, shape, points[:, 0], points[:, 1], cache_dir)
+        cells, values = apply_mapping(mapping, points[:, 2])
+        all_cells.append(cells)
+        all_values.append(values)
+
+    if not all_cells:
+        return np.empty(0, np.int64), np.empty(0)
+    cells, inverse = np.unique(np.concatenate(all_cells), return_inverse=True)
+    sums = np.bincount(inverse, weights=np.concatenate(all_values), minlength=len(cells))
+    counts = np.bincount(inverse, minlength=len(cells))
+    return cells, sums / counts
+
+
+def lookup_grid_values(cells, values, lats, lons):
+    """
+    Reads regridded values at points as a grid lookup: the value of the MODIS
+    cell containing each point, or NaN where the cell has none.
+    """
+    result = np.full(len(lats), np.nan)
+    if len(cells) == 0:
+        return result
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    point_cells = grid_cell_index(np.asarray(lats)[valid], np.asarray(lons)[valid])
+    pos = np.clip(np.searchsorted(cells, point_cells), 0, len(cells) - 1)
+    found = cells[pos] == point_cells
+    result[np.flatnonzero(valid)[found]] = values[pos[found]]
+    return result
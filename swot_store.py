@@ -0,0 +1,197 @@
+import os
+import json
+import numpy as np
+import xarray as xr
+
+from swot_cache import SSH_VAR_CANDIDATES, file_fingerprint
+
+# --- CONFIGURATION ---
+# The only SWOT variables the pipeline uses; the ~190 others are never read.
+# ssha_karin is the first of swot_cache.SSH_VAR_CANDIDATES found in a granule.
+GEOLOCATION_VARS = ['latitude', 'longitude']
+TIME_VAR = 'time'  # per swath line, seconds since TIME_EPOCH
+TIME_EPOCH = np.datetime64('2000-01-01T00:00:00', 'ns')
+
+# Columns of a day store: per kept swath line, and per pixel of those lines
+LINE_COLUMNS = {'time': np.float64, 'line': np.int32}
+PIXEL_COLUMNS = {'latitude': np.float32, 'longitude': np.float32, 'ssha_karin': np.float32}
+
+STORE_VERSION = 1
+
+
+# --- SCRIPT ---
+
+def _time_seconds(variable):
+    """
+    Swath line times as float64 seconds since TIME_EPOCH, whether or not
+    xarray decoded them.
+    """
+    values = variable.values
+    if np.issubdtype(values.dtype, np.datetime64):
+        return (values.astype('datetime64[ns]') - TIME_EPOCH) / np.timedelta64(1, 's')
+    return values.astype(np.float64)
+
+
+def ingest_granule(swot_file):
+    """
+    Reads the used variables of one granule. Returns (info, columns): info
+    describes the granule (SSH variable, swath shape, valid count, time and
+    location bounds) and columns holds the LINE_COLUMNS and PIXEL_COLUMNS
+    arrays of the swath lines that have at least one ssha_karin value, in
+    swath order. A granule without an SSH variable has no columns.
+    """
+    with xr.open_dataset(swot_file, decode_times=False) as ds:
+        ssh_var = next((var for var in SSH_VAR_CANDIDATES if var in ds.variables), None)
+        info = {'file': os.path.basename(swot_file), 'ssh_var': ssh_var,
+                'shape': list(ds['latitude'].shape), 'n_lines': 0, 'n_valid': 0}
+        if ssh_var is None:
+            return info, None
+
+        ssha = ds[ssh_var].values.astype(np.float32)
+        keep = np.flatnonzero(np.isfinite(ssha).any(axis=1))
+        columns = {
+            'time': _time_seconds(ds[TIME_VAR])[keep] if TIME_VAR in ds.variables else np.full(len(keep), np.nan),
+            'line': keep.astype(np.int32),
+            'latitude': ds['latitude'].values[keep].astype(np.float32).ravel(),
+            'longitude': ds['longitude'].values[keep].astype(np.float32).ravel(),
+            'ssha_karin': ssha[keep].ravel(),
+        }
+
+    info['n_lines'] = len(keep)
+    info['n_valid'] = int(np.isfinite(columns['ssha_karin']).sum())
+    if len(keep):
+        valid = np.isfinite(columns['ssha_karin'])
+        info['time'] = [float(np.nanmin(columns['time'])), float(np.nanmax(columns['time']))] \
+            if np.isfinite(columns['time']).any() else None
+        info['lat'] = [float(columns['latitude'][valid].min()), float(columns['latitude'][valid].max())]
+        info['lon'] = [float(columns['longitude'][valid].min()), float(columns['longitude'][valid].max())]
+    return info, columns
+
+
+def _day_paths(store_dir, date_str):
+    day_dir = os.path.join(store_dir, date_str)
+    return day_dir, os.path.join(day_dir, 'manifest.json')
+
+
+def ingest_day(date_str, swot_files, store_dir):
+    """
+    Returns the manifest of the day store of one date, (re)building it when
+    the day's granules changed.
+
+    A day store (store_dir/<date_str>/) holds one .npy file per column with
+    the granules concatenated, float32 for the swath variables; lines with
+    no ssha_karin value are dropped. The manifest lists the granules with
+    their row offsets and bounds, and is keyed by the source fingerprints.
+    Unreadable granules are recorded with their error.
+    """
+    swot_files = sorted(swot_files)
+    fingerprints = [file_fingerprint(f) for f in swot_files]
+    day_dir, manifest_path = _day_paths(store_dir, date_str)
+
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == STORE_VERSION and manifest.get('files') == fingerprints:
+                return manifest
+        except Exception as e:
+            print(f"Warning: rebuilding unreadable SWOT store for {date_str}: {e}")
+
+    granules, parts = [], {name: [] for name in list(LINE_COLUMNS) + list(PIXEL_COLUMNS)}
+    line_start = pixel_start = 0
+    for swot_file in swot_files:
+        try:
+            info, columns = ingest_granule(swot_file)
+        except Exception as e:
+            print(f"Warning: could not ingest {os.path.basename(swot_file)}: {e}")
+            granules.append({'file': os.path.basename(swot_file), 'error': str(e), 'n_lines': 0, 'n_valid': 0})
+            continue
+        info['line_start'], info['pixel_start'] = line_start, pixel_start
+        if columns is not None:
+            for name, values in columns.items():
+                parts[name].append(values)
+            line_start += len(columns['line'])
+            pixel_start += len(columns['ssha_karin'])
+        granules.append(info)
+
+    # The manifest is written last, so an interrupted write is never trusted
+    os.makedirs(day_dir, exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for name, dtype in {**LINE_COLUMNS, **PIXEL_COLUMNS}.items():
+        values = np.concatenate(parts[name]).astype(dtype) if parts[name] else np.empty(0, dtype)
+        np.save(os.path.join(day_dir, f'{name}.npy'), values)
+    manifest = {'version': STORE_VERSION, 'files': fingerprints, 'granules': granules}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def _load_columns(store_dir, date_str, names):
+    day_dir, _ = _day_paths(store_dir, date_str)
+    return {name: np.load(os.path.join(day_dir, f'{name}.npy'), mmap_mode='r') for name in names}
+
+
+def day_granules(date_str, swot_files, store_dir):
+    """
+    The day's granules from the store as (swot_file, shape, points) tuples
+    in the format of swot_cache.read_swot_granule: points is the full
+    flattened swath of latitude, longitude, ssha_karin, with NaN on the
+    dropped lines. Granules without SSH are left out.
+    """
+    manifest = ingest_day(date_str, swot_files, store_dir)
+    columns = _load_columns(store_dir, date_str, ['line'] + list(PIXEL_COLUMNS))
+    by_name = {os.path.basename(f): f for f in swot_files}
+
+    granules = []
+    for info in manifest['granules']:
+        if not info.get('ssh_var'):
+            continue
+        n_lines, n_pixels = info['shape'][0], int(np.prod(info['shape'][1:]))
+        lines = columns['line'][info['line_start']:info['line_start'] + info['n_lines']]
+        pixels = slice(info['pixel_start'], info['pixel_start'] + info['n_lines'] * n_pixels)
+        points = np.full((n_lines, n_pixels, 3), np.nan)
+        for k, name in enumerate(PIXEL_COLUMNS):
+            points[lines, :, k] = np.asarray(columns[name][pixels]).reshape(-1, n_pixels)
+        granules.append((by_name[info['file']], tuple(info['shape']), points.reshape(-1, 3)))
+    return granules
+
+
+def read_day_points(date_str, swot_files, store_dir, bbox=None, start=None, end=None):
+    """
+    Valid SWOT points of one day as an (N, 3) float64 array of latitude,
+    longitude, ssha_karin, optionally restricted to bbox (min_lat, max_lat,
+    min_lon, max_lon, longitudes as stored) and to swath lines timed between
+    start and end (datetime64 or ISO strings). Granules are skipped from
+    their manifest bounds, and only the matching lines are read.
+    """
+    manifest = ingest_day(date_str, swot_files, store_dir)
+    columns = _load_columns(store_dir, date_str, list(LINE_COLUMNS) + list(PIXEL_COLUMNS))
+    t0 = (np.datetime64(start, 'ns') - TIME_EPOCH) / np.timedelta64(1, 's') if start is not None else -np.inf
+    t1 = (np.datetime64(end, 'ns') - TIME_EPOCH) / np.timedelta64(1, 's') if end is not None else np.inf
+
+    selected = []
+    for info in manifest['granules']:
+        if not info.get('n_valid'):
+            continue
+        if bbox is not None and (info['lat'][1] < bbox[0] or info['lat'][0] > bbox[1] or
+                                 info['lon'][1] < bbox[2] or info['lon'][0] > bbox[3]):
+            continue
+        if info.get('time') and (info['time'][1] < t0 or info['time'][0] > t1):
+            continue
+
+        n_pixels = int(np.prod(info['shape'][1:]))
+        times = np.asarray(columns['time'][info['line_start']:info['line_start'] + info['n_lines']])
+        lines = np.flatnonzero(~((times < t0) | (times > t1)))  # NaN times are kept
+        if len(lines) == 0:
+            continue
+        # Lines are in time order, so the matching ones are one contiguous run
+        pixels = slice(info['pixel_start'] + lines[0] * n_pixels, info['pixel_start'] + (lines[-1] + 1) * n_pixels)
+        points = np.column_stack([np.asarray(columns[name][pixels], dtype=np.float64) for name in PIXEL_COLUMNS])
+        points = points[np.isfinite(points).all(axis=1)]
+        if bbox is not None:
+            points = points[(points[:, 0] >= bbox[0]) & (points[:, 0] <= bbox[1]) &
+                            (points[:, 1] >= bbox[2]) & (points[:, 1] <= bbox[3])]
+        selected.append(points)
+
+    return np.concatenate(selected) if selected else np.empty((0, 3))
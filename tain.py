@@ -1,23 +1,47 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import StratifiedKFold
-from sklearn.metrics import roc_auc_score
 import matplotlib.pyplot as plt
 import joblib
 import pickle
+from dataset_io import read_training_dataset, dataset_columns
+from forest_artifact import export_forest, load_forest, validate_forest
+from cv_runner import cross_validate, oob_evaluate, default_forest
+from hyperparameter_search import load_tuned, save_model_info
+from blocked_cv import blocked_splits, BLOCK_COLUMNS
 
 # --- CONFIGURATION ---
-TRAINING_DATA_FILE = r"D:\NASA_hackathon_2025\training_dataset_one_month.csv"
+# Parquet dataset written by the builder (a .csv export also works)
+TRAINING_DATA_FILE = r"D:\NASA_hackathon_2025\training_dataset"
 
 FEATURES = ["chlor_a", "carbon_phyto", "sst", "ssha_karin"]
 TARGET = "presence"
 N_FOLDS = 5   # Stratified folds (guarantees both classes in each)
 
+# 'folds' runs the N_FOLDS folds and the final fit in parallel processes;
+# 'oob' fits the final forest once and scores it on its out-of-bag rows
+CV_MODE = 'folds'
+
+# How 'folds' splits the rows: 'random' (stratified shuffle), or blocked by
+# 'tag', 'tile' (space-time) or 'date' so that neighbouring pings of one
+# track are never in both train and test (see blocked_cv.py)
+CV_SPLIT = 'tag'
+N_JOBS = -1   # Cores shared by folds and trees (-1 = all)
+
 # --- SCRIPT ---
 def train_and_evaluate_model():
     print(f"--- Loading training data from '{TRAINING_DATA_FILE}' ---")
-    df = pd.read_csv(TRAINING_DATA_FILE)
+    cv_split = CV_SPLIT
+    if CV_MODE == 'folds' and cv_split != 'random':
+        # Older exports (e.g. training_dataset_one_month.csv) have no tag id
+        available = set(dataset_columns(TRAINING_DATA_FILE))
+        if not set(BLOCK_COLUMNS[cv_split]) <= available:
+            fallback = 'tile' if set(BLOCK_COLUMNS['tile']) <= available else 'random'
+            print(f"Warning: the dataset lacks {sorted(set(BLOCK_COLUMNS[cv_split]) - available)} "
+                  f"for '{cv_split}' blocks; blocking by '{fallback}' instead.")
+            cv_split = fallback
+    block_columns = BLOCK_COLUMNS.get(cv_split, []) if CV_MODE == 'folds' else []
+    df = read_training_dataset(TRAINING_DATA_FILE, columns=FEATURES + [TARGET] + block_columns)
 
     # Drop rows with missing values in relevant columns
     columns_to_check = FEATURES + [TARGET]
@@ -36,54 +60,52 @@ def train_and_evaluate_model():
     print("\n--- Overall class distribution ---")
     print(y.value_counts())
 
-    # Step 2: StratifiedKFold setup
-    print(f"\n--- Performing {N_FOLDS}-fold Stratified Cross-Validation ---")
-    skf = StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=42)
-
-    auc_scores = []
+    # Use the configuration found by hyperparameter_search.py, if it was run
+    tuned = load_tuned()
+    model = default_forest(**tuned['params']) if tuned else default_forest()
+    if tuned:
+        print(f"\nUsing tuned RandomForest parameters: {tuned['params']}")
     feature_importances = pd.DataFrame(0, index=X.columns, columns=["importance"])
 
-    for fold, (train_idx, test_idx) in enumerate(skf.split(X, y)):
-        print(f"\nFold {fold+1}/{N_FOLDS}")
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-
-        print(" Train class balance:")
-        print(y_train.value_counts())
-        print(" Test class balance:")
-        print(y_test.value_counts())
-
-        # Train Random Forest
-        model = RandomForestClassifier(
-            n_estimators=200,
-            random_state=42,
-            n_jobs=-1,
-            class_weight="balanced"
-        )
-        model.fit(X_train, y_train)
-
-        # Predict probabilities
-        y_pred_proba = model.predict_proba(X_test)[:, 1]
-
-        # Compute AUC
-        auc = roc_auc_score(y_test, y_pred_proba)
-        auc_scores.append(auc)
-        print(f"  AUC for this fold: {auc:.4f}")
-
-        # Add feature importances
-        feature_importances["importance"] += model.feature_importances_
-
-    # Step 3: Final results
-    print("\n\n--- FINAL RESULTS ---")
-    mean_auc = np.mean(auc_scores)
-    std_auc = np.std(auc_scores)
-    print(f"Average Model Performance (AUC):")
-    print(f"  Mean AUC: {mean_auc:.4f}")
-    print(f"  Std Dev : {std_auc:.4f}")
-    print("(AUC of 0.5 = random, 1.0 = perfect. >0.7 is good)")
-
-    # Normalize importances
-    feature_importances["importance"] /= N_FOLDS
+    if CV_MODE == 'oob':
+        # Step 2: Out-of-bag estimate from the final forest itself
+        print("\n--- Fitting final model on ALL data with out-of-bag scoring ---")
+        oob_auc, final_model, seconds = oob_evaluate(model, X, y, n_jobs=N_JOBS)
+        print(f"  Fitted in {seconds:.1f} s")
+
+        print("\n\n--- FINAL RESULTS ---")
+        print(f"Out-of-bag Model Performance (AUC): {oob_auc:.4f}")
+        print("(AUC of 0.5 = random, 1.0 = perfect. >0.7 is good)")
+        feature_importances["importance"] = final_model.feature_importances_
+    else:
+        # Step 2: Fold setup; folds and the final model run in parallel
+        if cv_split == 'random':
+            print(f"\n--- Performing {N_FOLDS}-fold Stratified Cross-Validation ---")
+            splits = StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=42).split(X, y)
+        else:
+            print(f"\n--- Performing {N_FOLDS}-fold Cross-Validation blocked by {cv_split} ---")
+            splits = blocked_splits(df.reset_index(drop=True), y, cv_split, N_FOLDS)
+        fold_results, final_model = cross_validate(model, X, y, splits, n_jobs=N_JOBS)
+
+        for result in fold_results:
+            print(f"\nFold {result['fold']+1}/{N_FOLDS}")
+            print(f" Train rows: {result['n_train']} ({result['train_positive']} presence)")
+            print(f" Test rows : {result['n_test']} ({result['test_positive']} presence)")
+            print(f"  AUC for this fold: {result['auc']:.4f}  (wall time {result['seconds']:.1f} s)")
+            feature_importances["importance"] += result['importances']
+
+        # Step 3: Final results
+        auc_scores = [result['auc'] for result in fold_results]
+        print("\n\n--- FINAL RESULTS ---")
+        mean_auc = np.nanmean(auc_scores)
+        std_auc = np.nanstd(auc_scores)
+        print(f"Average Model Performance (AUC):")
+        print(f"  Mean AUC: {mean_auc:.4f}")
+        print(f"  Std Dev : {std_auc:.4f}")
+        print("(AUC of 0.5 = random, 1.0 = perfect. >0.7 is good)")
+
+        # Normalize importances
+        feature_importances["importance"] /= N_FOLDS
     feature_importances.sort_values(by="importance", ascending=False, inplace=True)
     print("\nMost Important Environmental Variables:")
     print(feature_importances)
@@ -97,16 +119,7 @@ def train_and_evaluate_model():
     plt.savefig("feature_importance_stratified.png")
     print("\nSaved feature importance plot to 'feature_importance_stratified.png'")
 
-    # Step 4: Train final model on ALL data
-    print("\n--- Training final model on ALL data ---")
-    final_model = RandomForestClassifier(
-        n_estimators=200,
-        random_state=42,
-        n_jobs=-1,
-        class_weight="balanced"
-    )
-    final_model.fit(X, y)
-
+    # Step 4: The final model on ALL data was fitted alongside the evaluation
     # Save the model (joblib and pickle)
     joblib.dump(final_model, "shark_rf_model.joblib")
     with open("shark_rf_model.pkl", "wb") as f:
@@ -114,6 +127,15 @@ def train_and_evaluate_model():
 
     print("Saved final model as 'shark_rf_model.joblib' and 'shark_rf_model.pkl'")
 
+    # Parameters and data fingerprint, checked by tune.py before it applies
+    # the threshold tuned by hyperparameter_search.py
+    save_model_info(final_model, X, y, "shark_rf_model.json")
+
+    # Flat node-array export for fast, memory-mapped loading (forest_artifact.py)
+    export_forest(final_model, "shark_rf_model.forest", feature_names=FEATURES)
+    if not validate_forest(final_model, load_forest("shark_rf_model.forest"), X):
+        print("Warning: 'shark_rf_model.forest' does not reproduce the sklearn model; do not use it.")
+
 # --- RUN ---
 if __name__ == "__main__":
     train_and_evaluate_model()
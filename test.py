@@ -1,33 +1,41 @@
 import os
 import glob
-import xarray as xr
+
+from catalog import parse_filename
+from nc_integrity import validate_files
 
 # --- CONFIG ---
 FOLDER = r"D:\NASA_hackathon_2025\chlorophyll"   # change to your folder path
 PATTERN = "*.nc"   # file pattern (all NetCDF files)
 
 # --- SCRIPT ---
-bad_files = []
-
-# Find all .nc files in the folder
-nc_files = glob.glob(os.path.join(FOLDER, PATTERN))
-
-print(f"Found {len(nc_files)} NetCDF files in {FOLDER}")
-
-for f in nc_files:
-    try:
-        # Try to open and immediately close
-        with xr.open_dataset(f) as ds:
-            _ = ds.attrs  # force read some metadata
-    except Exception as e:
-        print(f"❌ Could not open: {f}")
-        print(f"   Error: {e}")
-        bad_files.append(f)
-
-# --- Results ---
-if bad_files:
-    print("\n=== Files that could NOT be opened ===")
-    for bf in bad_files:
-        print(bf)
-else:
-    print("\n✅ All files opened successfully!")
+if __name__ == "__main__":
+    bad_files = []
+
+    # Find all .nc files in the folder; names the file catalog cannot parse
+    # are still checked, and listed as unparsed at the end
+    nc_files = sorted(glob.glob(os.path.join(FOLDER, PATTERN)))
+    unparsed = [f for f in nc_files if parse_filename(f) is None]
+
+    print(f"Found {len(nc_files)} NetCDF files in {FOLDER}")
+
+    # Checked in parallel by nc_integrity; files unchanged since the last run
+    # are taken from its report
+    for f, result in validate_files(nc_files).items():
+        if not result['openable']:
+            print(f"❌ Could not open: {f}")
+            print(f"   Error: {result['error']}")
+            bad_files.append(f)
+
+    # --- Results ---
+    if bad_files:
+        print("\n=== Files that could NOT be opened ===")
+        for bf in bad_files:
+            print(bf)
+    else:
+        print("\n✅ All files opened successfully!")
+
+    if unparsed:
+        print(f"\n=== {len(unparsed)} file(s) with names the catalog does not recognise (unparsed) ===")
+        for f in unparsed:
+            print(f)
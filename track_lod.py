@@ -0,0 +1,157 @@
+import numpy as np
+
+try:
+    from numba import njit
+except Exception:  # not installed, or failing to import (e.g. a shadowed dependency)
+    njit = None
+
+# --- CONFIGURATION ---
+# Douglas-Peucker tolerance (degrees) of each level of detail; level 0 keeps every ping
+LOD_TOLERANCES = [0.0, 0.002, 0.01, 0.05, 0.25, 1.0]
+
+# Approximate width of the map in pixels: a level is fine enough for a view
+# when its tolerance is below the size of one pixel
+MAP_PIXELS = 800
+
+
+# --- SCRIPT ---
+
+def _importance_numpy(x, y, importance):
+    """
+    Douglas-Peucker importance of every point: the largest tolerance at
+    which the point is still kept. Segments are split from a stack, with the
+    farthest point of each found by one vectorized pass.
+    """
+    stack = [(0, len(x) - 1, np.inf)]
+    while stack:
+        start, end, parent = stack.pop()
+        if end - start < 2:
+            continue
+        px, py = x[start + 1:end], y[start + 1:end]
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        length2 = dx * dx + dy * dy
+        if length2 > 0:
+            t = np.clip(((px - x[start]) * dx + (py - y[start]) * dy) / length2, 0.0, 1.0)
+        else:
+            t = np.zeros(len(px))
+        dist = np.hypot(px - (x[start] + t * dx), py - (y[start] + t * dy))
+        k = int(np.argmax(dist))
+        # A point is only kept when every enclosing split is kept too
+        value = min(dist[k], parent)
+        split = start + 1 + k
+        importance[split] = value
+        stack.append((start, split, value))
+        stack.append((split, end, value))
+
+
+def _importance_compiled(x, y, importance):
+    """
+    Same computation as _importance_numpy as a compiled loop.
+    """
+    n = len(x)
+    starts = np.empty(n, np.int64)
+    ends = np.empty(n, np.int64)
+    parents = np.empty(n)
+    starts[0], ends[0], parents[0] = 0, n - 1, np.inf
+    top = 1
+    while top > 0:
+        top -= 1
+        start, end, parent = starts[top], ends[top], parents[top]
+        if end - start < 2:
+            continue
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        length2 = dx * dx + dy * dy
+        best, split = -1.0, start + 1
+        for i in range(start + 1, end):
+            t = 0.0
+            if length2 > 0:
+                t = min(max(((x[i] - x[start]) * dx + (y[i] - y[start]) * dy) / length2, 0.0), 1.0)
+            ex, ey = x[i] - (x[start] + t * dx), y[i] - (y[start] + t * dy)
+            dist = np.sqrt(ex * ex + ey * ey)
+            if dist > best:
+                best, split = dist, i
+        value = min(best, parent)
+        importance[split] = value
+        starts[top], ends[top], parents[top] = start, split, value
+        starts[top + 1], ends[top + 1], parents[top + 1] = split, end, value
+        top += 2
+
+
+# numba is optional: compile the loop when it is installed, otherwise use NumPy
+if njit is not None:
+    _importance = njit(cache=True)(_importance_compiled)
+else:
+    _importance = _importance_numpy
+
+
+def douglas_peucker_importance(lon, lat):
+    """
+    Importance of every point of a track for Douglas-Peucker simplification:
+    the points kept at tolerance eps are exactly those with importance > eps,
+    so one pass gives every level of detail. Longitudes are scaled by the
+    cosine of the track's mean latitude; the end points are always kept.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    x = np.asarray(lon, dtype=np.float64) * np.cos(np.radians(np.nanmean(lat))) if len(lat) else np.empty(0)
+    importance = np.full(len(lat), np.inf)
+    if len(lat) > 2:
+        _importance(x, lat, importance)
+    return importance
+
+
+def choose_level(span_degrees, zoom_scale=1.0, pixels=MAP_PIXELS):
+    """
+    Coarsest level whose tolerance is below one pixel of a view showing
+    span_degrees at the given zoom (plotly's geo.projection.scale).
+    """
+    pixel = span_degrees / max(zoom_scale, 1e-6) / pixels
+    fine_enough = [level for level, tol in enumerate(LOD_TOLERANCES) if tol <= pixel]
+    return fine_enough[-1] if fine_enough else 0
+
+
+class TrackLOD:
+    """
+    Levels of detail of a set of time-sorted tracks ({id: {'lon', 'lat', ...}}).
+    Importances are computed on first use per track, and the kept points of
+    each (track, level) are cached. Because the simplification is of the
+    whole track, the points shown up to a time are a prefix of the kept
+    points plus the newest ping, so advancing in time only adds points at
+    the end.
+    """
+
+    def __init__(self, tracks):
+        self.tracks = tracks
+        self._importance = {}
+        self._kept = {}
+
+    def importance(self, pid):
+        if pid not in self._importance:
+            track = self.tracks[pid]
+            self._importance[pid] = douglas_peucker_importance(track['lon'], track['lat'])
+        return self._importance[pid]
+
+    def kept(self, pid, level):
+        """
+        Indices of the points of track pid kept at level.
+        """
+        key = (pid, level)
+        if key not in self._kept:
+            if level == 0:
+                self._kept[key] = np.arange(len(self.tracks[pid]['lon']))
+            else:
+                self._kept[key] = np.flatnonzero(self.importance(pid) > LOD_TOLERANCES[level])
+        return self._kept[key]
+
+    def visible(self, pid, level, n_pings, n_before=0):
+        """
+        Indices of the points drawn for the first n_pings pings of track pid
+        at level: the kept points, then always the newest ping, so the track
+        reaches the current position. With n_before, only the points added
+        since the first n_before pings were drawn.
+        """
+        if n_pings <= n_before:
+            return np.empty(0, dtype=np.int64)
+        kept = self.kept(pid, level)
+        first = np.searchsorted(kept, n_before)
+        last = np.searchsorted(kept, n_pings - 1)
+        return np.append(kept[first:last], n_pings - 1)
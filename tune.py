@@ -1,12 +1,17 @@
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from joblib import load
+from scoring_server import score_rows
+from hyperparameter_search import load_tuned, tuned_matches_model
 
 # --- 1. CONFIGURATION ---
 
 # Path to your trained Random Forest model
 MODEL_FILE = r"D:\NASA_hackathon_2025\shark_rf_model.joblib"
 
+# Parameters and training data fingerprint of that model, written by tain.py
+MODEL_INFO_FILE = r"D:\NASA_hackathon_2025\shark_rf_model.json"
+
 # Path to your input CSV file with environmental features for prediction
 INPUT_CSV = r"D:\NASA_hackathon_2025\prediction_input.csv"
 
@@ -19,10 +24,20 @@ FEATURES = ['chlor_a', 'carbon_phyto', 'sst', 'ssha_karin']
 # Probability threshold for predicting presence
 THRESHOLD = 0.5  # default 0.3; lower to catch borderline cases
 
+# Use the threshold tuned by hyperparameter_search.py instead, when it was
+# tuned for the loaded model (same parameters and training data)
+USE_TUNED_THRESHOLD = True
+
 # --- 2. SCRIPT ---
 
-# Load the trained Random Forest model
-model = load(MODEL_FILE)
+tuned = load_tuned() if USE_TUNED_THRESHOLD else None
+if tuned and not tuned_matches_model(tuned, MODEL_INFO_FILE):
+    print(f"Warning: the tuned threshold was not tuned for '{MODEL_FILE}' "
+          f"(different parameters or training data); using {THRESHOLD}")
+    tuned = None
+if tuned:
+    THRESHOLD = tuned['threshold']
+    print(f"Using tuned threshold {THRESHOLD:.3f} ({tuned['threshold_metric']})")
 
 # Load input data
 df = pd.read_csv(INPUT_CSV)
@@ -34,8 +49,13 @@ if missing_cols:
 
 X = df[FEATURES]
 
-# Predict probabilities
-probs = model.predict_proba(X)[:, 1]  # probability of presence=1
+# Predict probabilities on the scoring server (scoring_server.py) if it is
+# running, so the model is not reloaded; otherwise load it here
+try:
+    probs, _ = score_rows(X)
+except OSError:
+    model = load(MODEL_FILE)
+    probs = model.predict_proba(X)[:, 1]  # probability of presence=1
 
 # Apply threshold to get predicted presence
 predicted_presence = (probs >= THRESHOLD).astype(int)
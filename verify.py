@@ -1,5 +1,5 @@
-import os
-from datetime import datetime, timedelta
+import pandas as pd
+from catalog import load_catalog, date_bitmap
 
 # Path to your folder
 folder_path = r"D:\NASA_hackathon_2025\chrophyll_dataset"
@@ -7,18 +7,9 @@ folder_path = r"D:\NASA_hackathon_2025\chrophyll_dataset"
 # Output file for missing dates
 output_file_path = r"missing_dates.txt"
 
-# Extract all dates from filenames
-dates_in_folder = set()
-for f in os.listdir(folder_path):
-    if os.path.isfile(os.path.join(folder_path, f)):
-        parts = f.split('.')
-        if len(parts) > 1:
-            date_str = parts[1]  # e.g., '20140101'
-            try:
-                date_obj = datetime.strptime(date_str, "%Y%m%d")
-                dates_in_folder.add(date_obj)
-            except ValueError:
-                pass  # ignore files with unexpected names
+# Dates of all MODIS files in the folder, from the shared file catalog
+catalog = load_catalog({'modis': folder_path})
+dates_in_folder = set(catalog.dates('modis'))
 
 # Find the range of dates
 if not dates_in_folder:
@@ -27,13 +18,10 @@ else:
     min_date = min(dates_in_folder)
     max_date = max(dates_in_folder)
     
-    # Generate all dates in the range and find missing ones
-    current_date = min_date
-    missing_dates = []
-    while current_date <= max_date:
-        if current_date not in dates_in_folder:
-            missing_dates.append(current_date.strftime("%d/%m/%Y"))
-        current_date += timedelta(days=1)
+    # Date-coverage bitmap of the range; the missing dates are its gaps
+    # (data_coverage.py reports every product, with the download list to fill them)
+    all_dates = pd.date_range(min_date, max_date, freq='D')
+    missing_dates = all_dates[~date_bitmap(all_dates, dates_in_folder)].strftime("%d/%m/%Y").tolist()
     
     # Write missing dates to the output file
     with open(output_file_path, 'w') as f:
@@ -1,8 +1,6 @@
-import xarray as xr
-import numpy as np
-import glob
 import os
-from tqdm import tqdm
+from catalog import load_catalog
+from nc_integrity import validate_files
 
 # --- 1. CONFIGURATION ---
 BASE_DIR = r'D:\NASA_hackathon_2025' 
@@ -16,7 +14,8 @@ def verify_swot_content():
     """
     print(f"--- Scanning for SWOT files in: {SSH_DIR} ---")
     
-    swot_files = sorted(glob.glob(os.path.join(SSH_DIR, 'SWOT_L2_LR_SSH_*.nc')))
+    catalog = load_catalog({'ssh': SSH_DIR})
+    swot_files = [path for path, _ in catalog.entries('ssh', source='SWOT')]
     
     if not swot_files:
         print("ERROR: No raw SWOT.nc files found in the specified directory.")
@@ -29,31 +28,27 @@ def verify_swot_content():
     valid_files = []   # keep track of files with any valid data
     empty_files = []   # keep track of files that are all NaN
 
-    # Use tqdm for a progress bar
-    for file_path in tqdm(swot_files, desc="Checking SWOT files"):
-        try:
-            with xr.open_dataset(file_path) as ds:
-                if 'ssha_karin' in ds.variables:
-                    variable = ds['ssha_karin']
-                    
-                    total_elements = variable.size
-                    nan_count = np.isnan(variable).sum().item()
-                    valid_count = total_elements - nan_count
-                    
-                    total_points_all_files += total_elements
-                    total_valid_points_all_files += valid_count
-                    
-                    if valid_count == 0:
-                        empty_files.append(os.path.basename(file_path))
-                        print(f"  - File: {os.path.basename(file_path)} -> VERDICT: EMPTY (100% NaN values)")
-                    else:
-                        valid_files.append(os.path.basename(file_path))
-                        print(f"  - File: {os.path.basename(file_path)} -> VERDICT: VALID ({valid_count} values)")
-                else:
-                    print(f"  - File: {os.path.basename(file_path)} -> VERDICT: 'ssha_karin' variable NOT FOUND")
-
-        except Exception as e:
-            print(f"  - Could not process file {os.path.basename(file_path)}. Error: {e}")
+    # Files are scanned in parallel in chunks by nc_integrity; files unchanged
+    # since the last run are taken from its report
+    for file_path, result in validate_files(swot_files).items():
+        name = os.path.basename(file_path)
+        if not result['openable']:
+            print(f"  - Could not process file {name}. Error: {result['error']}")
+        elif result['variable'] is not None:
+            total_elements = result['n_values']
+            valid_count = result['n_valid']
+            
+            total_points_all_files += total_elements
+            total_valid_points_all_files += valid_count
+            
+            if valid_count == 0:
+                empty_files.append(name)
+                print(f"  - File: {name} -> VERDICT: EMPTY (100% NaN values)")
+            else:
+                valid_files.append(name)
+                print(f"  - File: {name} -> VERDICT: VALID ({valid_count} values of '{result['variable']}')")
+        else:
+            print(f"  - File: {name} -> VERDICT: 'ssha_karin' variable NOT FOUND")
 
     print("\n--- Verification Complete ---")
     